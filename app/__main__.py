@@ -4,13 +4,21 @@ import logging
 from app.core.bot import bot, dp
 from app.handlers import get_routers
 from app.middlewares.database import DatabaseMiddleware
-from app.services.mailing import process_mailing_tasks
+from app.services.invalidation import process_invalidations
+from app.services.mailing import process_delayed_mailings, process_mailing_retries, process_mailing_tasks
+from app.services.scraper import scraper
+from app.services.users import admin_registry
+from app.services.warmer import process_schedule_warmup
+from app.services.website import load_website
 
 
 async def on_startup() -> None:
     """Function to execute on bot startup."""
     dp.update.outer_middleware(DatabaseMiddleware())
     dp.include_routers(get_routers())
+    await scraper.start()
+    await admin_registry.load()
+    await load_website()
 
 
 async def on_shutdown() -> None:
@@ -18,6 +26,7 @@ async def on_shutdown() -> None:
     await dp.storage.close()
     await dp.fsm.storage.close()
     await bot.session.close()
+    await scraper.close()
 
 
 async def main() -> None:
@@ -28,6 +37,10 @@ async def main() -> None:
     async with asyncio.TaskGroup() as tg:
         tg.create_task(dp.start_polling(bot))
         tg.create_task(process_mailing_tasks())
+        tg.create_task(process_delayed_mailings())
+        tg.create_task(process_mailing_retries())
+        tg.create_task(process_schedule_warmup())
+        tg.create_task(process_invalidations())
 
 
 if __name__ == "__main__":
@@ -45,5 +45,50 @@ class Settings(BaseSettings):
             path=self.REDIS_DB,
         )
 
+    # Scraper settings
+    SCRAPER_MAX_CONNECTIONS: int = 20
+    SCRAPER_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    SCRAPER_KEEPALIVE_EXPIRY: float = 30.0
+    SCRAPER_CONNECT_TIMEOUT: float = 5.0
+    SCRAPER_READ_TIMEOUT: float = 30.0
+    SCRAPER_WRITE_TIMEOUT: float = 5.0
+    SCRAPER_POOL_TIMEOUT: float = 5.0
+    SCRAPER_DEADLINE: float = 5.0
+    SCRAPER_BREAKER_THRESHOLD: int = 5
+    SCRAPER_BREAKER_RESET_TIMEOUT: float = 60.0
+    SCRAPER_RATE_LIMIT: float = 5.0
+    SCRAPER_RATE_BURST: int = 10
+    SCRAPER_MAX_IN_FLIGHT: int = 8
+
+    # Cache settings
+    SCHEDULE_CACHE_TTL: int = 3600
+    SCHEDULE_CACHE_RETENTION: int = 604800
+    CATALOG_CACHE_MAX_AGE: int = 86400
+    USER_CACHE_TTL: int = 3600
+    USER_CACHE_LOCAL_TTL: int = 60
+    USER_CACHE_SIZE: int = 10000
+
+    # Mailing settings
+    MAILING_BATCH_SIZE: int = 100
+    MAILING_PAGE_SIZE: int = 1000
+    MAILING_BULK_BATCH_SIZE: int = 5000
+    MAILING_BLOCK_TIMEOUT: int = 5000
+    MAILING_CLAIM_IDLE_TIME: int = 60000
+    MAILING_CLAIM_INTERVAL: int = 30
+    MAILING_MAX_CLAIMS: int = 5
+    MAILING_SCHEDULER_MAX_SLEEP: int = 60
+    MAILING_RATE_LIMIT: float = 30.0
+    MAILING_RATE_BURST: int = 30
+    MAILING_SENDERS: int = 8
+    MAILING_CHAT_INTERVAL: float = 1.0
+    MAILING_MAX_RETRIES: int = 3
+    MAILING_RETRY_DELAY: float = 30.0
+    MAILING_DEAD_LETTER_MAXLEN: int = 10000
+
+    # Warm-up settings
+    WARMUP_INTERVAL: int = 1800
+    WARMUP_CONCURRENCY: int = 4
+    WARMUP_JITTER: float = 2.0
+
 
 settings = Settings()
@@ -1,3 +1,6 @@
+import html
+import io
+from collections.abc import AsyncIterator
 from datetime import datetime
 from urllib.parse import urlparse
 
@@ -8,13 +11,78 @@ from aiogram.types import CallbackQuery, Message
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.filters.admin import AdminFilter
-from app.services.mailing import create_mailing_task
-from app.services.users import get_users
-from app.utils.keyboards import mailing_kb, back_button_kb
+from app.services.mailing import (
+    CampaignStatus,
+    clear_dead_letters,
+    create_mailing_bulk,
+    create_mailing_campaign,
+    get_dead_letters,
+    get_mailing_campaign,
+    get_mailing_campaigns,
+    get_mailing_progress,
+    replay_dead_letters,
+    set_mailing_status,
+)
+from app.services.scraper import ScraperError, scraper
+from app.services.users import get_users_count
+from app.services.website import get_website
+from app.utils.keyboards import (
+    mailing_kb,
+    back_button_kb,
+    audience_kb,
+    dead_letters_kb,
+    mailing_campaigns_kb,
+    campaign_kb,
+    get_faculties_kb,
+    get_courses_kb,
+    get_groups_kb,
+)
+from app.utils.scraper import unavailable_message
 from app.utils.states import MailingStates
 
 router = Router()
 
+campaign_statuses = {
+    CampaignStatus.SCHEDULED: "⏰ Заплановано",
+    CampaignStatus.QUEUED: "🕓 В черзі",
+    CampaignStatus.ACTIVE: "📤 Надсилається",
+    CampaignStatus.PAUSED: "⏸ Призупинено",
+    CampaignStatus.CANCELLED: "⛔️ Скасовується",
+}
+
+
+def get_audience(message_data: dict) -> dict:
+    """Build the users filters of a campaign from the mailing data."""
+    audience = {
+        "user_faculty": message_data.get("audience_faculty"),
+        "user_course": message_data.get("audience_course"),
+        "user_group": message_data.get("audience_group"),
+    }
+    return {key: value for key, value in audience.items() if value is not None}
+
+
+async def read_recipients(message: Message) -> AsyncIterator[int]:
+    """Read chat ids separated by spaces, commas or new lines from the message text or its text file."""
+    if message.document:
+        lines = io.TextIOWrapper(await message.bot.download(message.document), encoding="utf-8")
+    else:
+        lines = (message.text or "").splitlines()
+
+    for line in lines:
+        for value in line.replace(",", " ").split():
+            if value.lstrip("-").isdigit():
+                yield int(value)
+
+
+def describe_audience(message_data: dict) -> str:
+    """Describe the campaign audience for the admin."""
+    parts = [
+        message_data.get("audience_faculty_name"),
+        f"{message_data['audience_course']}-й курс" if message_data.get("audience_course") else None,
+        message_data.get("audience_group_name"),
+    ]
+    return ", ".join(part for part in parts if part) or "Усі користувачі"
+
 
 @router.callback_query(F.data == "manage_mailing", AdminFilter())
 async def manage_mailing_handler(call: CallbackQuery, state: FSMContext) -> None:
@@ -26,6 +94,7 @@ async def manage_mailing_handler(call: CallbackQuery, state: FSMContext) -> None
     button_text = message_data.get("button_text", "Не встановлено")
     button_url = message_data.get("button_url", "Не встановлено")
     scheduled = message_data.get("delay", "Не заплановано")
+    audience = describe_audience(message_data)
     is_button_set = "Встановлено" if button_text != "Не встановлено" else "Не встановлено"
 
     text_message = (
@@ -36,6 +105,7 @@ async def manage_mailing_handler(call: CallbackQuery, state: FSMContext) -> None
         f"💬 <b>Текст кнопки:</b> {button_text}\n"
         f"🔗 <b>Посилання кнопки:</b> {button_url}\n"
         f"⏰ <b>Запланована розсилка:</b> {scheduled}\n"
+        f"👥 <b>Аудиторія:</b> {audience}\n"
     )
     await call.message.edit_text(
         text=text_message,
@@ -160,6 +230,164 @@ async def set_delay_handler(message: Message, state: FSMContext) -> None:
     )
 
 
+@router.callback_query(F.data == "mailing_audience", AdminFilter())
+async def mailing_audience_handler(call: CallbackQuery, state: FSMContext, session: AsyncSession) -> None:
+    """Handles the mailing_audience callback query."""
+    message_data = await state.get_data()
+    count = await get_users_count(session=session, is_active=True, **get_audience(message_data))
+    await call.message.edit_text(
+        text=(
+            f"👥 <b>Аудиторія:</b> {describe_audience(message_data)}\n"
+            f"📨 <b>Отримувачів:</b> {count}\n"
+        ),
+        reply_markup=audience_kb(),
+    )
+
+
+@router.callback_query(F.data == "audience_faculties", AdminFilter())
+async def audience_faculties_handler(call: CallbackQuery) -> None:
+    """Handles the audience_faculties callback query."""
+    try:
+        faculties = await scraper.get_faculties()
+    except ScraperError:
+        await call.answer(text=unavailable_message, show_alert=True)
+        return
+
+    await call.message.edit_text(
+        text="<b>Виберіть факультатив ⬇️</b>",
+        reply_markup=get_faculties_kb(faculties=faculties, prefix="audience_", back="mailing_audience"),
+    )
+
+
+@router.callback_query(F.data.startswith("audience_faculty_"), AdminFilter())
+async def set_audience_faculty_handler(call: CallbackQuery, state: FSMContext, session: AsyncSession) -> None:
+    """Handles the audience_faculty_ callback queries."""
+    faculty = call.data.replace("audience_faculty_", "")
+    try:
+        faculties = await scraper.get_faculties()
+    except ScraperError:
+        faculties = {}
+
+    await state.update_data(
+        audience_faculty=int(faculty),
+        audience_faculty_name=faculties.get(faculty, faculty),
+        audience_group=None,
+        audience_group_name=None,
+    )
+    await mailing_audience_handler(call=call, state=state, session=session)
+
+
+@router.callback_query(F.data == "audience_courses", AdminFilter())
+async def audience_courses_handler(call: CallbackQuery) -> None:
+    """Handles the audience_courses callback query."""
+    await call.message.edit_text(
+        text="<b>Виберіть курс ⬇️</b>",
+        reply_markup=get_courses_kb(prefix="audience_", back="mailing_audience"),
+    )
+
+
+@router.callback_query(F.data.startswith("audience_course_"), AdminFilter())
+async def set_audience_course_handler(call: CallbackQuery, state: FSMContext, session: AsyncSession) -> None:
+    """Handles the audience_course_ callback queries."""
+    course = call.data.replace("audience_course_", "")
+    await state.update_data(audience_course=int(course), audience_group=None, audience_group_name=None)
+    await mailing_audience_handler(call=call, state=state, session=session)
+
+
+@router.callback_query(F.data == "audience_groups", AdminFilter())
+async def audience_groups_handler(call: CallbackQuery, state: FSMContext, session: AsyncSession) -> None:
+    """Handles the audience_groups callback query."""
+    message_data = await state.get_data()
+    faculty = message_data.get("audience_faculty")
+    course = message_data.get("audience_course")
+    if not faculty or not course:
+        await call.answer(text="⁉️ Спочатку виберіть факультатив і курс.", show_alert=True)
+        return
+
+    website = await get_website(session=session)
+    try:
+        groups = await scraper.get_groups(year_id=website.year, faculty=faculty, course=course)
+    except ScraperError:
+        await call.answer(text=unavailable_message, show_alert=True)
+        return
+
+    await call.message.edit_text(
+        text="<b>Виберіть групу ⬇️</b>",
+        reply_markup=get_groups_kb(groups=groups, prefix="audience_", back="mailing_audience"),
+    )
+
+
+@router.callback_query(F.data.startswith("audience_group_"), AdminFilter())
+async def set_audience_group_handler(call: CallbackQuery, state: FSMContext, session: AsyncSession) -> None:
+    """Handles the audience_group_ callback queries."""
+    group = call.data.replace("audience_group_", "")
+    message_data = await state.get_data()
+    faculty = message_data.get("audience_faculty")
+    course = message_data.get("audience_course")
+    # Only the group id fits in callback data, so the name comes from the cached groups list.
+    website = await get_website(session=session)
+    try:
+        groups = await scraper.get_groups(year_id=website.year, faculty=faculty, course=course)
+    except ScraperError:
+        await call.answer(text=unavailable_message, show_alert=True)
+        return
+
+    group_name = {str(key): value for key, value in groups.items()}.get(group, group)
+    await state.update_data(audience_group=int(group), audience_group_name=group_name)
+    await mailing_audience_handler(call=call, state=state, session=session)
+
+
+@router.callback_query(F.data == "audience_reset", AdminFilter())
+async def audience_reset_handler(call: CallbackQuery, state: FSMContext, session: AsyncSession) -> None:
+    """Handles the audience_reset callback query."""
+    await state.update_data(
+        audience_faculty=None,
+        audience_faculty_name=None,
+        audience_course=None,
+        audience_group=None,
+        audience_group_name=None,
+    )
+    await mailing_audience_handler(call=call, state=state, session=session)
+
+
+@router.callback_query(F.data == "dead_letters", AdminFilter())
+async def dead_letters_handler(call: CallbackQuery) -> None:
+    """Handles the dead_letters callback query."""
+    total, letters = await get_dead_letters()
+    if not total:
+        await call.message.edit_text(
+            text="✅ <b>Невдалих доставок немає.</b>",
+            reply_markup=back_button_kb("manage_mailing"),
+        )
+        return
+
+    lines = [f"• <code>{letter['chat_id']}</code>: {html.escape(letter['error'][:100])}" for letter in letters]
+    await call.message.edit_text(
+        text=f"☠️ <b>Невдалих доставок:</b> {total}\n\n<b>Останні:</b>\n" + "\n".join(lines),
+        reply_markup=dead_letters_kb(),
+    )
+
+
+@router.callback_query(F.data == "replay_dead_letters", AdminFilter())
+async def replay_dead_letters_handler(call: CallbackQuery) -> None:
+    """Handles the replay_dead_letters callback query."""
+    replayed = await replay_dead_letters()
+    await call.message.edit_text(
+        text=f"✅ <b>Повторно заплановано доставок:</b> {replayed}",
+        reply_markup=back_button_kb("manage_mailing"),
+    )
+
+
+@router.callback_query(F.data == "clear_dead_letters", AdminFilter())
+async def clear_dead_letters_handler(call: CallbackQuery) -> None:
+    """Handles the clear_dead_letters callback query."""
+    await clear_dead_letters()
+    await call.message.edit_text(
+        text="✅ <b>Невдалі доставки видалено.</b>",
+        reply_markup=back_button_kb("manage_mailing"),
+    )
+
+
 @router.callback_query(F.data == "reset_mailing", AdminFilter())
 async def reset_mailing_handler(call: CallbackQuery, state: FSMContext) -> None:
     """Handles the reset_mailing callback query."""
@@ -171,7 +399,7 @@ async def reset_mailing_handler(call: CallbackQuery, state: FSMContext) -> None:
 
 
 @router.callback_query(F.data == "start_mailing", AdminFilter())
-async def start_mailing_handler(call: CallbackQuery, state: FSMContext, session: AsyncSession) -> None:
+async def start_mailing_handler(call: CallbackQuery, state: FSMContext) -> None:
     """Handles the start_mailing callback query."""
     message_data = await state.get_data()
 
@@ -190,13 +418,141 @@ async def start_mailing_handler(call: CallbackQuery, state: FSMContext, session:
     else:
         await call.message.edit_text(text="✅ <b>Розсилку запущено.</b>")
 
-    async for user in get_users(session=session):
-        mailing_data = {
-            "chat_id": str(user.user_id),
-            "text": text,
-            "image": image,
-            "button_text": button_text,
-            "button_url": button_url,
-            "delay": delay
-        }
-        await create_mailing_task(mailing_data)
\ No newline at end of file
+    mailing_data = {
+        "text": text,
+        "image": image,
+        "button_text": button_text,
+        "button_url": button_url,
+        "delay": delay,
+    }
+    await create_mailing_campaign(mailing_data, audience=get_audience(message_data))
+
+
+@router.callback_query(F.data == "add_recipients", AdminFilter())
+async def add_recipients_handler(call: CallbackQuery, state: FSMContext) -> None:
+    """Handles the add_recipients callback query."""
+    message_data = await state.get_data()
+    if not message_data.get("text") and not message_data.get("image"):
+        await call.message.answer(text="⁉️ <b>Ви не встановили текст або зображення для розсилки.</b>")
+        return
+
+    await call.message.edit_text(
+        text=(
+            "📋 <b>Надішліть ID отримувачів через пробіл, кому або з нового рядка.</b>\n\n"
+            "📎 <b>Великий список можна надіслати файлом .txt</b>"
+        ),
+        reply_markup=back_button_kb("manage_mailing"),
+    )
+    await state.set_state(MailingStates.recipients)
+
+
+@router.message(StateFilter(MailingStates.recipients), AdminFilter())
+async def set_recipients_handler(message: Message, state: FSMContext) -> None:
+    """Handles the recipients message and starts the mailing for them."""
+    message_data = await state.get_data()
+    await state.set_state(None)
+
+    mailing_data = {
+        "text": message_data.get("text"),
+        "image": message_data.get("image"),
+        "button_text": message_data.get("button_text"),
+        "button_url": message_data.get("button_url"),
+        "delay": message_data.get("delay"),
+    }
+    await create_mailing_bulk(
+        recipients=read_recipients(message), mailing_data=mailing_data, progress_chat_id=message.chat.id
+    )
+
+
+@router.callback_query(F.data == "mailing_campaigns", AdminFilter())
+async def mailing_campaigns_handler(call: CallbackQuery) -> None:
+    """Handles the mailing_campaigns callback query."""
+    campaigns = await get_mailing_campaigns()
+    if not campaigns:
+        await call.message.edit_text(
+            text="ℹ️ <b>Активних розсилок немає.</b>",
+            reply_markup=back_button_kb("manage_mailing"),
+        )
+        return
+
+    buttons = {
+        campaign_id: f"{campaign_statuses.get(campaign.get('status'), '❔')} · "
+        f"{datetime.fromtimestamp(int(campaign['created_at'])).strftime('%d.%m.%Y %H:%M')}"
+        for campaign_id, campaign in campaigns
+    }
+    await call.message.edit_text(
+        text="📊 <b>Активні розсилки:</b>",
+        reply_markup=mailing_campaigns_kb(buttons),
+    )
+
+
+@router.callback_query(F.data.startswith("campaign_"), AdminFilter())
+async def campaign_handler(call: CallbackQuery) -> None:
+    """Handles the campaign callback query."""
+    await show_campaign(call=call, campaign_id=call.data.removeprefix("campaign_"))
+
+
+@router.callback_query(F.data.startswith("pause_campaign_"), AdminFilter())
+async def pause_campaign_handler(call: CallbackQuery) -> None:
+    """Handles the pause_campaign callback query."""
+    await change_campaign_status(
+        call=call, campaign_id=call.data.removeprefix("pause_campaign_"), status=CampaignStatus.PAUSED
+    )
+
+
+@router.callback_query(F.data.startswith("resume_campaign_"), AdminFilter())
+async def resume_campaign_handler(call: CallbackQuery) -> None:
+    """Handles the resume_campaign callback query."""
+    await change_campaign_status(
+        call=call, campaign_id=call.data.removeprefix("resume_campaign_"), status=CampaignStatus.ACTIVE
+    )
+
+
+@router.callback_query(F.data.startswith("cancel_campaign_"), AdminFilter())
+async def cancel_campaign_handler(call: CallbackQuery) -> None:
+    """Handles the cancel_campaign callback query."""
+    campaign_id = call.data.removeprefix("cancel_campaign_")
+    if not await set_mailing_status(campaign_id=campaign_id, status=CampaignStatus.CANCELLED):
+        await call.answer(text="⁉️ Розсилка вже завершена.", show_alert=True)
+        return
+
+    await call.message.edit_text(
+        text="✅ <b>Розсилку скасовано.</b>",
+        reply_markup=back_button_kb("mailing_campaigns"),
+    )
+
+
+async def change_campaign_status(call: CallbackQuery, campaign_id: str, status: CampaignStatus) -> None:
+    """Updates the campaign status and shows its progress again."""
+    if not await set_mailing_status(campaign_id=campaign_id, status=status):
+        await call.answer(text="⁉️ Розсилка вже завершена.", show_alert=True)
+        return
+    await show_campaign(call=call, campaign_id=campaign_id)
+
+
+async def show_campaign(call: CallbackQuery, campaign_id: str) -> None:
+    """Shows the progress of a mailing campaign."""
+    campaign = await get_mailing_campaign(campaign_id)
+    if not campaign:
+        await call.answer(text="⁉️ Розсилка вже завершена.", show_alert=True)
+        return
+
+    progress = await get_mailing_progress(campaign_id)
+    status = campaign.get("status")
+    eta = int(progress["eta"])
+
+    text_message = (
+        f"📊 <b>Розсилка:</b> {campaign_statuses.get(status, '❔')}\n\n"
+        f"👥 <b>Всього отримувачів:</b> {progress['total']}\n"
+        f"📤 <b>Оброблено:</b> {progress['processed']} / {progress['total']}\n"
+        f"✅ <b>Надіслано:</b> {progress['sent']}\n"
+        f"❌ <b>Помилок:</b> {progress['failed']}\n"
+        f"🚫 <b>Заблокували бота:</b> {progress['blocked']}\n"
+        f"🔁 <b>Повторних спроб:</b> {progress['retried']}\n"
+        f"⚡️ <b>Швидкість:</b> {progress['rate']:.1f} повідомлень/с\n"
+        f"⏳ <b>Залишилось:</b> {eta // 60} хв {eta % 60} с\n"
+    )
+    await call.message.edit_text(
+        text=text_message,
+        reply_markup=campaign_kb(campaign_id=campaign_id, is_paused=status == CampaignStatus.PAUSED),
+    )
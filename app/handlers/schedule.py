@@ -2,7 +2,7 @@ from aiogram import F, Router
 from aiogram.types import CallbackQuery
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.services.scraper import scraper
+from app.services.scraper import ScraperError, scraper
 from app.services.users import get_user_by_id, update_user
 from app.services.website import get_website
 from app.utils.keyboards import (
@@ -13,7 +13,7 @@ from app.utils.keyboards import (
     get_groups_kb,
     back_button_kb,
 )
-from app.utils.scraper import week_days
+from app.utils.scraper import unavailable_message, week_days
 
 router = Router()
 
@@ -40,7 +40,12 @@ async def schedule_handler(call: CallbackQuery, session: AsyncSession) -> None:
 @router.callback_query(F.data == "change_group")
 async def get_faculties_handler(call: CallbackQuery) -> None:
     """Handles for the change_group callback query."""
-    faculties = await scraper.get_faculties()
+    try:
+        faculties = await scraper.get_faculties()
+    except ScraperError:
+        await call.answer(text=unavailable_message, show_alert=True)
+        return
+
     await call.message.edit_text(
         text="<b>Виберіть факультатив ⬇️</b>",
         reply_markup=get_faculties_kb(faculties=faculties),
@@ -72,11 +77,16 @@ async def get_groups_handler(call: CallbackQuery, session: AsyncSession) -> None
         user_course=int(course),
     )
     website = await get_website(session=session)
-    groups = await scraper.get_groups(
-        year_id=website.year,
-        faculty=user.user_faculty,
-        course=user.user_course,
-    )
+    try:
+        groups = await scraper.get_groups(
+            year_id=website.year,
+            faculty=user.user_faculty,
+            course=user.user_course,
+        )
+    except ScraperError:
+        await call.answer(text=unavailable_message, show_alert=True)
+        return
+
     await call.message.edit_text(
         text="<b>Виберіть групу ⬇️</b>",
         reply_markup=get_groups_kb(groups=groups),
@@ -86,8 +96,17 @@ async def get_groups_handler(call: CallbackQuery, session: AsyncSession) -> None
 @router.callback_query(F.data.startswith("group_"))
 async def get_days_handler(call: CallbackQuery, session: AsyncSession) -> None:
     """Handles for the group_ callback queries."""
-    group = call.data.split(";")[0].replace("group_", "")
-    group_name = call.data.split(";")[1]
+    group = call.data.replace("group_", "")
+    # Only the group id fits in callback data, so the name comes from the cached groups list.
+    user = await get_user_by_id(session=session, user_id=call.from_user.id)
+    website = await get_website(session=session)
+    try:
+        groups = await scraper.get_groups(year_id=website.year, faculty=user.user_faculty, course=user.user_course)
+    except ScraperError:
+        await call.answer(text=unavailable_message, show_alert=True)
+        return
+
+    group_name = {str(key): value for key, value in groups.items()}.get(group, group)
     await update_user(
         session=session,
         user_id=call.from_user.id,
@@ -111,20 +130,21 @@ async def get_schedule_handler(call: CallbackQuery, session: AsyncSession) -> No
         user_id=call.from_user.id,
     )
 
-    # Get schedule returns tuple of (paired_subjects, unpaired_subjects)
-    paired_subjects, unpaired_subjects = await scraper.get_schedule(
-        year=website.year,
-        semester=website.semester,
-        faculty=user.user_faculty,
-        course=user.user_course,
-        group=user.user_group,
-        day=int(day),
-    )
+    try:
+        week = await scraper.get_week(
+            year=website.year,
+            semester=website.semester,
+            faculty=user.user_faculty,
+            course=user.user_course,
+            group=user.user_group,
+        )
+    except ScraperError:
+        await call.answer(text=unavailable_message, show_alert=True)
+        return
 
-    # Format message using class method
     formatted_message = scraper.format_schedule_message(
-        paired_subjects=paired_subjects,
-        unpaired_subjects=unpaired_subjects,
+        week=week,
+        day=int(day),
         selected_day=day_name,
         user_group_name=user.user_group_name,
     )
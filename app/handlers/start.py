@@ -4,7 +4,7 @@ from aiogram.filters import CommandStart
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.filters.admin import AdminFilter
-from app.services.users import create_user, get_user_is_admin
+from app.services.users import admin_registry, create_user
 from app.utils.keyboards import start_kb, options_kb
 
 router = Router()
@@ -28,10 +28,7 @@ async def start_command_handler(message: Message, session: AsyncSession) -> None
 @router.callback_query(F.data == "start")
 async def start_callback_handler(call: CallbackQuery, session: AsyncSession) -> None:
     """Handles for the start callback query."""
-    is_admin = await get_user_is_admin(
-        session=session,
-        user_id=call.from_user.id,
-    )
+    is_admin = await admin_registry.is_admin(user_id=call.from_user.id, session=session)
     await call.message.edit_text(
         text=start_message,
         reply_markup=start_kb(is_admin=is_admin),
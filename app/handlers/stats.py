@@ -3,7 +3,10 @@ from aiogram.types import CallbackQuery
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.filters.admin import AdminFilter
-from app.services.users import get_latest_user, get_users_count
+from app.middlewares.database import session_metrics
+from app.services.scraper import scraper
+from app.services.users import get_latest_user, get_users_count, user_cache
+from app.services.warmer import warmer
 from app.utils.keyboards import back_button_kb
 
 router = Router()
@@ -17,13 +20,31 @@ async def stats_handler(call: CallbackQuery, session: AsyncSession) -> None:
 
     username_or_id = latest_user.username if latest_user.username else latest_user.user_id
     registration_time = latest_user.created_at.strftime("%d.%m.%Y %H:%M")
+    breaker_states = {
+        scraper.breaker.CLOSED: "✅ Доступний",
+        scraper.breaker.HALF_OPEN: "🔄 Перевірка доступності",
+        scraper.breaker.OPEN: f"⛔️ Недоступний (повтор через {scraper.breaker.retry_in:.0f} с)",
+    }
+    last_sweep = warmer.last_sweep_at.strftime("%d.%m.%Y %H:%M") if warmer.last_sweep_at else "Ще не виконувалось"
 
     await call.message.edit_text(
         text=(
             f"📊 <b>Статистика:</b>\n\n"
             f"👥 <b>Кількість користувачів:</b> {count_users}\n"
             f"👤 <b>Останній зареєстрований:</b> {username_or_id}\n"
-            f"🕒 <b>Час реєстрації:</b> {registration_time}"
+            f"🕒 <b>Час реєстрації:</b> {registration_time}\n"
+            f"🗄 <b>Кеш розкладу (влучання / промахи):</b> {scraper.cache.hits} / {scraper.cache.misses}\n"
+            f"👤 <b>Кеш користувачів (влучання / промахи):</b> {user_cache.hits} / {user_cache.misses}\n"
+            f"🗃 <b>Оновлень з запитами до БД:</b> {session_metrics.sessions_used} / {session_metrics.updates}\n"
+            f"🔌 <b>Утримання з'єднання (середнє / макс.):</b> "
+            f"{session_metrics.held_average * 1000:.1f} / {session_metrics.held_max * 1000:.1f} мс\n"
+            f"🔗 <b>Об'єднано запитів до сайту:</b> {scraper.coalesced}\n"
+            f"🔥 <b>Останнє оновлення кешу:</b> {last_sweep}\n"
+            f"🌐 <b>Сайт розкладу:</b> {breaker_states[scraper.breaker.state]}\n"
+            f"❌ <b>Помилок поспіль:</b> {scraper.breaker.failures}\n"
+            f"⏳ <b>Черга запитів до сайту:</b> {scraper.limiter.queue_depth}\n"
+            f"⏱ <b>Очікування (середнє / макс.):</b> "
+            f"{scraper.limiter.average_wait:.2f} / {scraper.limiter.max_wait:.2f} с"
         ),
         reply_markup=back_button_kb("options"),
     )
@@ -5,6 +5,7 @@ from aiogram.types import CallbackQuery, Message
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.filters.admin import AdminFilter
+from app.services.scraper import scraper
 from app.services.website import update_website
 from app.utils.keyboards import back_button_kb
 from app.utils.states import SiteStates
@@ -42,6 +43,7 @@ async def set_website_handler(message: Message, state: FSMContext, session: Asyn
         await message.answer(text="✅ <b>Семестр успішно змінено.</b>")
     elif current_state == SiteStates.year:
         await update_website(session=session, year=int(message.text))
+        await scraper.invalidate_catalog()
         await message.answer(text="✅ <b>Рік навчання успішно змінено.</b>")
 
     await state.clear()
@@ -1,12 +1,86 @@
+import logging
+import time
 from collections.abc import Awaitable, Callable
 from typing import Any
 
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject
+from sqlalchemy.event import listens_for
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, SessionTransaction
 
 from app.core.database import sessionmaker
 
 
+@listens_for(Session, "after_begin")
+def on_session_begin(session: Session, transaction: SessionTransaction, connection: Any) -> None:
+    """Remember when a session took a connection for its transaction."""
+    session.info.setdefault("begun_at", time.monotonic())
+
+
+@listens_for(Session, "after_transaction_end")
+def on_session_transaction_end(session: Session, transaction: SessionTransaction) -> None:
+    """Add the time the connection was held once the outermost transaction releases it."""
+    begun_at = session.info.get("begun_at")
+    if transaction.parent is None and begun_at is not None:
+        session.info["held"] = session.info.get("held", 0.0) + time.monotonic() - begun_at
+        del session.info["begun_at"]
+
+
+class LazySession:
+    """Stand-in for an AsyncSession that only creates it when a handler first uses it."""
+
+    def __init__(self, factory: async_sessionmaker[AsyncSession]):
+        self._factory = factory
+        self._session: AsyncSession | None = None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._factory()
+        return getattr(self._session, name)
+
+    @property
+    def used(self) -> bool:
+        """Whether the session was created at all."""
+        return self._session is not None
+
+    @property
+    def held(self) -> float:
+        """Seconds the session held a pooled connection."""
+        return self._session.info.get("held", 0.0) if self._session else 0.0
+
+    async def close(self) -> None:
+        """Close the session if it was created, returning its connection to the pool."""
+        if self._session is not None:
+            await self._session.close()
+
+
+class SessionMetrics:
+    """Counts how many updates used the database and how long they held a connection."""
+
+    def __init__(self):
+        self.updates = 0
+        self.sessions_used = 0
+        self.held_total = 0.0
+        self.held_max = 0.0
+
+    def record(self, used: bool, held: float) -> None:
+        """Record the database usage of a single update."""
+        self.updates += 1
+        if used:
+            self.sessions_used += 1
+        self.held_total += held
+        self.held_max = max(self.held_max, held)
+
+    @property
+    def held_average(self) -> float:
+        """Average connection hold time of the updates that used a session."""
+        return self.held_total / self.sessions_used if self.sessions_used else 0.0
+
+
+session_metrics = SessionMetrics()
+
+
 class DatabaseMiddleware(BaseMiddleware):
     async def __call__(
         self,
@@ -14,6 +88,11 @@ class DatabaseMiddleware(BaseMiddleware):
         event: TelegramObject,
         data: dict[str, Any],
     ) -> Any:
-        async with sessionmaker() as session:
-            data["session"] = session
+        session = LazySession(sessionmaker)
+        data["session"] = session
+        try:
             return await handler(event, data)
+        finally:
+            await session.close()
+            session_metrics.record(used=session.used, held=session.held)
+            logging.debug(f"Update handled: session used={session.used}, connection held={session.held:.3f} s")
@@ -1,5 +1,6 @@
 from .base import Base
+from .schedule import ScheduleSnapshot
 from .user import User
 from .website import Website
 
-__all__ = ["Base", "User", "Website"]
+__all__ = ["Base", "ScheduleSnapshot", "User", "Website"]
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Integer, BigInteger, String, DateTime, func
+from sqlalchemy import Integer, BigInteger, String, DateTime, Index, func, text, true
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -8,6 +8,21 @@ from app.models.base import Base
 
 class User(Base):
     __tablename__ = "users"
+    # Campaigns page through active users by id, optionally within one audience filter, so every
+    # filter combination the bot issues has a partial (filter columns..., id) index over active rows.
+    __table_args__ = (
+        Index("ix_users_active", "id", postgresql_where=text("is_active")),
+        Index("ix_users_active_faculty", "user_faculty", "id", postgresql_where=text("is_active")),
+        Index("ix_users_active_course", "user_course", "id", postgresql_where=text("is_active")),
+        Index(
+            "ix_users_active_faculty_course",
+            "user_faculty",
+            "user_course",
+            "id",
+            postgresql_where=text("is_active"),
+        ),
+        Index("ix_users_active_group", "user_group", "id", postgresql_where=text("is_active")),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(BigInteger, unique=True, nullable=False)
@@ -17,4 +32,6 @@ class User(Base):
     user_group: Mapped[int | None] = mapped_column(Integer, nullable=True)
     user_group_name: Mapped[str | None] = mapped_column(String(50), nullable=True)
     is_admin: Mapped[bool] = mapped_column(default=False, index=True)
+    is_active: Mapped[bool] = mapped_column(default=True, server_default=true())
+    blocked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,144 @@
+import json
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+
+from redis.asyncio import Redis
+
+from app.utils.scraper import WeekSchedule
+
+
+class ScheduleCache:
+    """Redis cache of parsed week schedules keyed by group."""
+
+    PREFIX = "schedule"
+
+    def __init__(self, redis: Redis, ttl: int, retention: int):
+        self.redis = redis
+        self.ttl = ttl
+        self.retention = retention
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, year: int, semester: int, faculty: int, course: int, group: int) -> str:
+        """Build the cache key for a group week."""
+        return f"{self.PREFIX}:{year}:{semester}:{faculty}:{course}:{group}"
+
+    async def get(self, year: int, semester: int, faculty: int, course: int, group: int) -> WeekSchedule | None:
+        """Get a cached week for the group, marked as stale once it is older than the TTL."""
+        raw = await self.redis.get(self._key(year, semester, faculty, course, group))
+        if raw is None:
+            self.misses += 1
+            return None
+
+        week = WeekSchedule.from_json(raw)
+        if time.time() - week.fetched_at > self.ttl:
+            self.misses += 1
+            return week._replace(is_stale=True)
+
+        self.hits += 1
+        return week
+
+    async def set(self, year: int, semester: int, faculty: int, course: int, group: int, week: WeekSchedule) -> None:
+        """Store a week for the group, keeping it as a fallback for the retention period."""
+        await self.redis.set(self._key(year, semester, faculty, course, group), week.to_json(), ex=self.retention)
+
+
+class CatalogCache:
+    """Redis cache of faculties and groups that keeps serving entries after they go stale."""
+
+    PREFIX = "catalog"
+
+    def __init__(self, redis: Redis, max_age: int):
+        self.redis = redis
+        self.max_age = max_age
+
+    def _key(self, key: tuple) -> str:
+        """Build the cache key for a catalog entry."""
+        return ":".join([self.PREFIX, *map(str, key)])
+
+    async def get(self, key: tuple) -> tuple[dict, bool] | None:
+        """Get a cached catalog entry and whether it is older than max_age."""
+        raw = await self.redis.get(self._key(key))
+        if raw is None:
+            return None
+
+        entry = json.loads(raw)
+        is_stale = time.time() - entry["fetched_at"] > self.max_age
+        return dict(entry["items"]), is_stale
+
+    async def set(self, key: tuple, items: dict) -> None:
+        """Store a catalog entry without expiry, so it survives restarts."""
+        entry = {"fetched_at": time.time(), "items": list(items.items())}
+        await self.redis.set(self._key(key), json.dumps(entry, ensure_ascii=False))
+
+    async def invalidate_all(self) -> None:
+        """Drop every cached catalog entry."""
+        async for key in self.redis.scan_iter(match=f"{self.PREFIX}:*", count=500):
+            await self.redis.delete(key)
+
+
+class UserCache:
+    """Bounded in-process LRU of user profiles in front of a Redis copy shared by all replicas."""
+
+    PREFIX = "user"
+
+    def __init__(self, redis: Redis, ttl: int, local_ttl: int, max_size: int):
+        self.redis = redis
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.max_size = max_size
+        self.local: OrderedDict[int, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, user_id: int) -> str:
+        """Build the cache key for a user profile."""
+        return f"{self.PREFIX}:{user_id}"
+
+    def _remember(self, user_id: int, profile: dict) -> None:
+        """Keep a profile in process, evicting the least recently used one when full."""
+        self.local[user_id] = (time.monotonic() + self.local_ttl, profile)
+        self.local.move_to_end(user_id)
+        if len(self.local) > self.max_size:
+            self.local.popitem(last=False)
+
+    async def get(self, user_id: int) -> dict | None:
+        """Get a cached profile, from process memory first and from Redis after that."""
+        entry = self.local.get(user_id)
+        if entry and entry[0] > time.monotonic():
+            self.local.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+        raw = await self.redis.get(self._key(user_id))
+        if raw is None:
+            self.local.pop(user_id, None)
+            self.misses += 1
+            return None
+
+        profile = json.loads(raw)
+        self._remember(user_id, profile)
+        self.hits += 1
+        return profile
+
+    async def set(self, user_id: int, profile: dict) -> None:
+        """Store a profile in Redis and in process memory."""
+        await self.redis.set(self._key(user_id), json.dumps(profile, default=str), ex=self.ttl)
+        self._remember(user_id, profile)
+
+    def forget(self, user_ids: Iterable[int]) -> None:
+        """Drop profiles from process memory only, e.g. when another replica changed them."""
+        for user_id in user_ids:
+            self.local.pop(user_id, None)
+
+    def forget_all(self) -> None:
+        """Drop every profile from process memory only."""
+        self.local.clear()
+
+    async def invalidate(self, user_ids: Iterable[int]) -> None:
+        """Drop profiles from Redis and from process memory."""
+        user_ids = list(user_ids)
+        if user_ids:
+            await self.redis.delete(*map(self._key, user_ids))
+        self.forget(user_ids)
@@ -0,0 +1,44 @@
+import asyncio
+import logging
+from collections.abc import Callable
+
+from app.core.bot import storage
+
+INVALIDATION_CHANNEL = "cache_invalidation"
+# Sent to every handler after a reconnect, since broadcasts may have been missed meanwhile.
+INVALIDATE_ALL = "*"
+
+invalidation_handlers: dict[str, Callable[[str], None]] = {}
+
+
+def on_invalidation(kind: str, handler: Callable[[str], None]) -> None:
+    """Register the handler that drops in-process entries of a kind when any replica changes them."""
+    invalidation_handlers[kind] = handler
+
+
+async def broadcast_invalidation(kind: str, key: str = "") -> None:
+    """Tell every replica, this one included, to drop its in-process entries of a kind."""
+    await storage.redis.publish(INVALIDATION_CHANNEL, f"{kind}:{key}")
+
+
+async def process_invalidations() -> None:
+    """Listen for invalidations from all replicas and pass them to the registered handlers."""
+    reconnecting = False
+    while True:
+        try:
+            async with storage.redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                if reconnecting:
+                    for handler in invalidation_handlers.values():
+                        handler(INVALIDATE_ALL)
+                reconnecting = True
+
+                async for message in pubsub.listen():
+                    kind, _, key = message["data"].decode("utf-8").partition(":")
+                    handler = invalidation_handlers.get(kind)
+                    if handler:
+                        handler(key)
+
+        except Exception as e:
+            logging.error(f"Error processing cache invalidations: {e}", exc_info=True)
+            await asyncio.sleep(5)
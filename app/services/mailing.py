@@ -1,57 +1,701 @@
 import asyncio
 import json
 import logging
+import os
+import random
+import socket
+import time
+import uuid
+from collections import Counter
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager, suppress
 from datetime import datetime
+from enum import StrEnum
 
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from redis.exceptions import ResponseError
 
 from app.core.bot import bot, storage
+from app.core.config import settings
+from app.core.database import sessionmaker
+from app.services.sender import DeliveryStatus, sender
+from app.services.users import deactivate_users, get_users_count, get_users_page
 
+MAILING_STREAM = "mailing_stream"
+MAILING_GROUP = "mailing_workers"
+MAILING_CONSUMER = f"{socket.gethostname()}-{os.getpid()}"
+MAILING_DELAYED = "mailing_delayed"
+MAILING_RETRIES = "mailing_retries"
+MAILING_DEAD = "mailing_dead"
+MAILING_DEAD_ENTRIES = "mailing_dead_entries"
+MAILING_CAMPAIGN = "mailing:campaign:{}"
+MAILING_RECIPIENTS = "mailing:campaign:{}:recipients"
+MAILING_STATS = "mailing:campaign:{}:stats"
+MAILING_DELIVERED = "mailing:campaign:{}:delivered"
+MAILING_CAMPAIGNS = "mailing:campaigns"
+MAILING_PAUSED = "mailing:paused"
+MAILING_COUNTERS = ("total", "processed", "sent", "failed", "blocked", "retried")
+MAILING_CONTENT = ("text", "image", "button_text", "button_url")
+
+# Atomically moves due campaigns from the delayed sorted set to the mailing stream.
+MOVE_DUE_MAILINGS = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+for _, member in ipairs(due) do
+    redis.call('ZREM', KEYS[1], member)
+    redis.call('XADD', KEYS[2], '*', 'campaign_id', member)
+end
+return #due
+"""
+
+# Atomically takes the deliveries whose retry time has come.
+POP_DUE_RETRIES = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+"""
+
+# Parks a campaign only if it is still paused, so a resume racing with the worker is never lost.
+PARK_PAUSED_CAMPAIGN = """
+if redis.call('HGET', KEYS[1], 'status') ~= ARGV[2] then
+    return 0
+end
+redis.call('SADD', KEYS[2], ARGV[1])
+return 1
+"""
+
+# Resumes a campaign and puts it back on the stream if a worker had parked it.
+RESUME_CAMPAIGN = """
+redis.call('HSET', KEYS[1], 'status', ARGV[2])
+if redis.call('SREM', KEYS[2], ARGV[1]) == 1 then
+    redis.call('XADD', KEYS[3], '*', 'campaign_id', ARGV[1])
+end
+return 1
+"""
+
+mailing_scheduled = asyncio.Event()
+mailing_retry_scheduled = asyncio.Event()
+
+
+class CampaignStatus(StrEnum):
+    SCHEDULED = "scheduled"
+    QUEUED = "queued"
+    ACTIVE = "active"
+    PAUSED = "paused"
+    CANCELLED = "cancelled"
+
+
+async def create_mailing_campaign(mailing_data: dict, audience: dict | None = None) -> str:
+    """Store a mailing campaign once and queue it, or schedule it if it has a delay."""
+    return await queue_mailing_campaign(campaign_id=uuid.uuid4().hex, mailing_data=mailing_data, audience=audience)
+
+
+async def create_mailing_bulk(
+    recipients: AsyncIterator[int],
+    mailing_data: dict,
+    batch_size: int = settings.MAILING_BULK_BATCH_SIZE,
+    progress_chat_id: int | None = None,
+) -> str | None:
+    """Store a campaign for an explicit list of recipients, writing them to Redis in pipelined batches.
+
+    Repeated chat ids are sent to once, since delivery progress is tracked per chat.
+    Returns None, storing nothing, if the list has no recipients.
+    """
+    campaign_id = uuid.uuid4().hex
+    recipients_key = MAILING_RECIPIENTS.format(campaign_id)
+
+    progress_message = None
+    if progress_chat_id:
+        progress_message = await bot.send_message(chat_id=progress_chat_id, text="⏳ <b>Додано отримувачів:</b> 0")
+
+    total = 0
+    seen = set()
+    batch = []
+    async for chat_id in recipients:
+        if chat_id in seen:
+            continue
+        seen.add(chat_id)
+        batch.append(chat_id)
+        if len(batch) < batch_size:
+            continue
+
+        total += await push_mailing_recipients(recipients_key=recipients_key, chat_ids=batch)
+        batch = []
+        if progress_message:
+            await progress_message.edit_text(text=f"⏳ <b>Додано отримувачів:</b> {total}")
+
+    if batch:
+        total += await push_mailing_recipients(recipients_key=recipients_key, chat_ids=batch)
+
+    if not total:
+        if progress_message:
+            await progress_message.edit_text(text="⁉️ <b>У списку немає жодного отримувача.</b>")
+        return None
+
+    if progress_message:
+        await progress_message.edit_text(text=f"✅ <b>Розсилку запущено для {total} отримувачів.</b>")
+
+    return await queue_mailing_campaign(campaign_id=campaign_id, mailing_data={**mailing_data, "recipients": 1})
+
+
+async def push_mailing_recipients(recipients_key: str, chat_ids: list[int]) -> int:
+    """Append a batch of recipients to a campaign in one round trip."""
+    async with storage.redis.pipeline(transaction=False) as pipe:
+        for start in range(0, len(chat_ids), 1000):
+            pipe.rpush(recipients_key, *chat_ids[start : start + 1000])
+        await pipe.execute()
+    return len(chat_ids)
+
+
+async def queue_mailing_campaign(campaign_id: str, mailing_data: dict, audience: dict | None = None) -> str:
+    """Store the campaign content and queue it, or schedule it if it has a delay."""
+    campaign = {key: value for key, value in mailing_data.items() if value is not None}
+    campaign["audience"] = json.dumps(audience or {})
+    campaign["created_at"] = int(datetime.now().timestamp())
+    campaign["status"] = CampaignStatus.QUEUED
 
-async def create_mailing_task(mailing_data: dict) -> None:
-    """Create a mailing task in Redis stream."""
     if mailing_data.get("delay"):
-        delay_str = mailing_data["delay"]
-        delay_dt = datetime.strptime(delay_str, "%d.%m.%Y %H:%M")
-        delay_timestamp = int(delay_dt.timestamp())
-        mailing_data["scheduled_time"] = delay_timestamp
+        delay_dt = datetime.strptime(mailing_data["delay"], "%d.%m.%Y %H:%M")
+        campaign["scheduled_time"] = int(delay_dt.timestamp())
+        campaign["status"] = CampaignStatus.SCHEDULED
 
-    await storage.redis.xadd("mailing_stream", {"data": json.dumps(mailing_data)})
+    await storage.redis.hset(MAILING_CAMPAIGN.format(campaign_id), mapping=campaign)
+    await storage.redis.sadd(MAILING_CAMPAIGNS, campaign_id)
 
+    if campaign.get("scheduled_time"):
+        await storage.redis.zadd(MAILING_DELAYED, {campaign_id: campaign["scheduled_time"]})
+        mailing_scheduled.set()
+    else:
+        await storage.redis.xadd(MAILING_STREAM, {"campaign_id": campaign_id})
 
-async def process_mailing_tasks() -> None:
+    return campaign_id
+
+
+async def get_mailing_campaign(campaign_id: str) -> dict | None:
+    """Get a stored mailing campaign."""
+    campaign = await storage.redis.hgetall(MAILING_CAMPAIGN.format(campaign_id))
+    if not campaign:
+        return None
+    return {key.decode("utf-8"): value.decode("utf-8") for key, value in campaign.items()}
+
+
+async def get_mailing_campaigns() -> list[tuple[str, dict]]:
+    """Get the campaigns that are scheduled, queued or in progress."""
+    campaigns = []
+    for campaign_id in sorted(await storage.redis.smembers(MAILING_CAMPAIGNS)):
+        campaign_id = campaign_id.decode("utf-8")
+        campaign = await get_mailing_campaign(campaign_id)
+        if campaign:
+            campaigns.append((campaign_id, campaign))
+        else:
+            await storage.redis.srem(MAILING_CAMPAIGNS, campaign_id)
+    return campaigns
+
+
+async def get_mailing_progress(campaign_id: str) -> dict[str, float]:
+    """Get campaign counters together with the current send rate and the estimated time left."""
+    stats = await storage.redis.hgetall(MAILING_STATS.format(campaign_id))
+    stats = {key.decode("utf-8"): float(value) for key, value in stats.items()}
+    progress = {counter: int(stats.get(counter, 0)) for counter in MAILING_COUNTERS}
+
+    rate = stats.get("rate", 0.0)
+    finished = progress["sent"] + progress["failed"] + progress["blocked"]
+    progress["rate"] = rate
+    progress["eta"] = (progress["total"] - finished) / rate if rate else 0.0
+    return progress
+
+
+async def set_mailing_status(campaign_id: str, status: CampaignStatus) -> bool:
+    """Pause, resume or cancel a campaign; returns False if it no longer exists."""
+    campaign_key = MAILING_CAMPAIGN.format(campaign_id)
+    if not await storage.redis.exists(campaign_key):
+        return False
+
+    if status == CampaignStatus.ACTIVE:
+        await storage.redis.eval(
+            RESUME_CAMPAIGN, 3, campaign_key, MAILING_PAUSED, MAILING_STREAM, campaign_id, CampaignStatus.ACTIVE
+        )
+        return True
+
+    if status == CampaignStatus.CANCELLED and (
+        await storage.redis.zrem(MAILING_DELAYED, campaign_id) or await storage.redis.srem(MAILING_PAUSED, campaign_id)
+    ):
+        # The campaign is not held by any worker, so nothing else will clean it up.
+        await finish_mailing_campaign(campaign_id)
+        return True
+
+    await storage.redis.hset(campaign_key, "status", status)
+    return True
+
+
+async def finish_mailing_campaign(campaign_id: str) -> None:
+    """Remove a finished or cancelled campaign, keeping its counters for a day."""
+    async with storage.redis.pipeline(transaction=True) as pipe:
+        pipe.delete(
+            MAILING_CAMPAIGN.format(campaign_id),
+            MAILING_RECIPIENTS.format(campaign_id),
+            MAILING_DELIVERED.format(campaign_id),
+        )
+        pipe.srem(MAILING_CAMPAIGNS, campaign_id)
+        pipe.srem(MAILING_PAUSED, campaign_id)
+        pipe.expire(MAILING_STATS.format(campaign_id), 86400)
+        await pipe.execute()
+
+
+async def create_mailing_group() -> None:
+    """Create the consumer group for the mailing stream if it does not exist yet."""
+    try:
+        await storage.redis.xgroup_create(MAILING_STREAM, MAILING_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def process_mailing_entries(entries: list[tuple[bytes, dict]]) -> None:
+    """Deliver the campaigns behind mailing entries and acknowledge them.
+
+    An entry that raises stays pending, so it is reclaimed and tried again up to MAILING_MAX_CLAIMS times.
+    """
+    for entry_id, entry_data in entries:
+        if b"campaign_id" in entry_data:
+            async with mailing_entry_heartbeat(entry_id):
+                await process_campaign(campaign_id=entry_data[b"campaign_id"].decode("utf-8"))
+        elif b"data" in entry_data:
+            await requeue_legacy_mailing(entry_data)
+        elif entry_data:
+            # Entries reclaimed after being deleted come back without data, anything else is unknown.
+            logging.warning(f"Dropping unknown mailing entry {entry_id}: {entry_data}")
+
+        await ack_mailing_entry(entry_id)
+
+
+async def ack_mailing_entry(entry_id: bytes) -> None:
+    """Acknowledge and delete a processed entry."""
+    async with storage.redis.pipeline(transaction=True) as pipe:
+        pipe.xack(MAILING_STREAM, MAILING_GROUP, entry_id)
+        pipe.xdel(MAILING_STREAM, entry_id)
+        await pipe.execute()
+
+
+async def requeue_legacy_mailing(entry_data: dict) -> None:
+    """Turn a per-user entry written before campaigns existed into a single delivery on the retry queue."""
+    task = json.loads(entry_data[b"data"])
+    if not task.get("chat_id"):
+        logging.warning(f"Dropping legacy mailing entry without a chat: {task}")
+        return
+
+    content = {key: task[key] for key in MAILING_CONTENT if task.get(key)}
+    delivery = {"campaign_id": "legacy", "chat_id": task["chat_id"], "attempt": 0, "campaign": content}
+    due = max(time.time(), task.get("scheduled_time") or 0)
+    await storage.redis.zadd(MAILING_RETRIES, {json.dumps(delivery): due})
+    mailing_retry_scheduled.set()
+
+
+async def dead_letter_mailing_entry(entry_id: bytes, entry_data: dict, times_delivered: int) -> None:
+    """Set aside an entry that kept failing, together with its campaign, and stop retrying it."""
+    dead_entry = {"entry_id": entry_id, "times_delivered": times_delivered, **entry_data}
+    if b"campaign_id" in entry_data:
+        campaign_id = entry_data[b"campaign_id"].decode("utf-8")
+        dead_entry["campaign"] = json.dumps(await get_mailing_campaign(campaign_id) or {})
+        await finish_mailing_campaign(campaign_id)
+
+    await storage.redis.xadd(
+        MAILING_DEAD_ENTRIES, dead_entry, maxlen=settings.MAILING_DEAD_LETTER_MAXLEN, approximate=True
+    )
+    await ack_mailing_entry(entry_id)
+    logging.error(f"Mailing entry {entry_id} failed {times_delivered} times, moved to {MAILING_DEAD_ENTRIES}")
+
+
+async def process_campaign(campaign_id: str) -> None:
+    """Send a campaign to its audience, expanding recipients page by page."""
+    campaign = await get_mailing_campaign(campaign_id)
+    if not campaign:
+        logging.warning(f"Mailing campaign {campaign_id} not found")
+        return
+
+    campaign_key = MAILING_CAMPAIGN.format(campaign_id)
+    if campaign.get("status") in (CampaignStatus.SCHEDULED, CampaignStatus.QUEUED):
+        await storage.redis.hset(campaign_key, "status", CampaignStatus.ACTIVE)
+
+    total = await count_campaign_recipients(campaign_id=campaign_id, campaign=campaign)
+    await storage.redis.hset(MAILING_STATS.format(campaign_id), "total", total)
+
+    # A restarted campaign continues after the last checkpointed batch.
+    cursor = int(campaign.get("cursor", 0))
+    async for recipients in iter_recipient_pages(campaign_id=campaign_id, campaign=campaign, after=cursor):
+        for start in range(0, len(recipients), settings.MAILING_BATCH_SIZE):
+            status = await storage.redis.hget(campaign_key, "status")
+            if status is None or status.decode("utf-8") == CampaignStatus.CANCELLED:
+                logging.info(f"Mailing campaign {campaign_id} cancelled")
+                await finish_mailing_campaign(campaign_id)
+                return
+            if status.decode("utf-8") == CampaignStatus.PAUSED and await park_mailing_campaign(campaign_id):
+                # The cursor is already checkpointed; the entry is acked and resuming queues a new one.
+                logging.info(f"Mailing campaign {campaign_id} paused at {cursor}")
+                return
+
+            batch = recipients[start : start + settings.MAILING_BATCH_SIZE]
+            await deliver_batch(campaign_id=campaign_id, campaign=campaign, batch=batch)
+            cursor = batch[-1][0]
+            await storage.redis.hset(campaign_key, "cursor", cursor)
+
+        logging.info(f"Mailing campaign {campaign_id} delivered up to {cursor}")
+
+    await finish_mailing_campaign(campaign_id)
+
+
+async def deliver_batch(campaign_id: str, campaign: dict, batch: list[tuple[int, int]]) -> None:
+    """Deliver a batch of (offset, chat id) recipients, skipping the ones already marked as delivered.
+
+    Every chat is marked in the campaign bitmap as soon as it is done, so a batch interrupted
+    by a crash is resumed without sending to the same chat twice.
+    """
+    delivered_key = MAILING_DELIVERED.format(campaign_id)
+    async with storage.redis.pipeline(transaction=False) as pipe:
+        for offset, _ in batch:
+            pipe.getbit(delivered_key, offset)
+        delivered = await pipe.execute()
+
+    offsets = {chat_id: offset for (offset, chat_id), is_delivered in zip(batch, delivered) if not is_delivered}
+    if not offsets:
+        return
+
+    async def mark_delivered(chat_id: int, status: DeliveryStatus, error: str | None) -> None:
+        if status == DeliveryStatus.RETRYABLE:
+            await schedule_mailing_retry(
+                campaign_id=campaign_id, campaign=campaign, chat_id=chat_id, attempt=1, error=error
+            )
+        elif status == DeliveryStatus.FAILED:
+            await dead_letter_delivery(
+                delivery=build_delivery(campaign_id=campaign_id, campaign=campaign, chat_id=chat_id, attempt=1),
+                error=error,
+            )
+        await storage.redis.setbit(delivered_key, offsets[chat_id], 1)
+
+    started = time.monotonic()
+    results = await sender.deliver(chat_ids=list(offsets), campaign=campaign, on_done=mark_delivered)
+    await record_mailing_progress(
+        campaign_id=campaign_id, processed=len(offsets), results=results, elapsed=time.monotonic() - started
+    )
+    await deactivate_blocked_users()
+
+
+async def touch_mailing_entry(entry_id: bytes) -> None:
+    """Reset the idle time of an entry so other workers do not reclaim a campaign still in progress."""
+    await storage.redis.xclaim(
+        MAILING_STREAM, MAILING_GROUP, MAILING_CONSUMER, min_idle_time=0, message_ids=[entry_id], justid=True
+    )
+
+
+@asynccontextmanager
+async def mailing_entry_heartbeat(entry_id: bytes) -> AsyncIterator[None]:
+    """Keep touching an entry while the worker is busy with it, however long a single batch stalls.
+
+    A crashed worker stops the heartbeat with it, so its entry still becomes idle and is reclaimed.
+    """
+    interval = settings.MAILING_CLAIM_IDLE_TIME / 1000 / 3
+
+    async def beat() -> None:
+        while True:
+            try:
+                await touch_mailing_entry(entry_id)
+            except Exception as e:
+                logging.warning(f"Failed to refresh the claim of mailing entry {entry_id}: {e}")
+            await asyncio.sleep(interval)
+
+    task = asyncio.create_task(beat())
+    try:
+        yield
+    finally:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+
+async def park_mailing_campaign(campaign_id: str) -> bool:
+    """Set a paused campaign aside until it is resumed; returns False if it was resumed meanwhile."""
+    return bool(
+        await storage.redis.eval(
+            PARK_PAUSED_CAMPAIGN,
+            2,
+            MAILING_CAMPAIGN.format(campaign_id),
+            MAILING_PAUSED,
+            campaign_id,
+            CampaignStatus.PAUSED,
+        )
+    )
+
+
+async def record_mailing_progress(
+    campaign_id: str, processed: int, results: Counter[DeliveryStatus], elapsed: float
+) -> None:
+    """Add the results of a delivered batch to the campaign counters in one round trip."""
+    finished = results[DeliveryStatus.SENT] + results[DeliveryStatus.FAILED] + results[DeliveryStatus.BLOCKED]
+    stats_key = MAILING_STATS.format(campaign_id)
+
+    async with storage.redis.pipeline(transaction=False) as pipe:
+        pipe.hincrby(stats_key, "processed", processed)
+        pipe.hincrby(stats_key, "sent", results[DeliveryStatus.SENT])
+        pipe.hincrby(stats_key, "failed", results[DeliveryStatus.FAILED])
+        pipe.hincrby(stats_key, "blocked", results[DeliveryStatus.BLOCKED])
+        pipe.hincrby(stats_key, "retried", results[DeliveryStatus.RETRYABLE])
+        pipe.hset(stats_key, "rate", finished / elapsed if elapsed else 0)
+        await pipe.execute()
+
+
+def build_delivery(campaign_id: str, campaign: dict, chat_id: int, attempt: int) -> dict:
+    """Build a single delivery of the campaign content to a chat, as kept in the retry queue."""
+    content = {key: campaign[key] for key in MAILING_CONTENT if campaign.get(key)}
+    return {"campaign_id": campaign_id, "chat_id": chat_id, "attempt": attempt, "campaign": content}
+
+
+async def dead_letter_delivery(delivery: dict, error: str | None) -> None:
+    """Keep a delivery that will not be attempted again, with its error, for the admins to review."""
+    await storage.redis.xadd(
+        MAILING_DEAD,
+        {"delivery": json.dumps(delivery), "error": error or ""},
+        maxlen=settings.MAILING_DEAD_LETTER_MAXLEN,
+        approximate=True,
+    )
+
+
+async def schedule_mailing_retry(
+    campaign_id: str, campaign: dict, chat_id: int, attempt: int, error: str | None = None
+) -> None:
+    """Schedule another delivery attempt with exponential backoff, or dead-letter it after the last one."""
+    delivery = build_delivery(campaign_id=campaign_id, campaign=campaign, chat_id=chat_id, attempt=attempt)
+
+    if attempt > settings.MAILING_MAX_RETRIES:
+        await dead_letter_delivery(delivery=delivery, error=error)
+        await record_retry_result(campaign_id=campaign_id, status=DeliveryStatus.FAILED)
+        return
+
+    delay = settings.MAILING_RETRY_DELAY * 2 ** (attempt - 1)
+    due = time.time() + random.uniform(delay / 2, delay)
+    await storage.redis.zadd(MAILING_RETRIES, {json.dumps(delivery): due})
+    mailing_retry_scheduled.set()
+
+
+async def record_retry_result(campaign_id: str, status: DeliveryStatus) -> None:
+    """Count the final result of a retried delivery while the campaign counters are still kept."""
+    stats_key = MAILING_STATS.format(campaign_id)
+    if await storage.redis.exists(stats_key):
+        await storage.redis.hincrby(stats_key, status, 1)
+
+
+async def retry_mailing_delivery(delivery: dict) -> None:
+    """Make the next attempt of a delivery that failed with a retryable error."""
+    campaign = delivery["campaign"]
+    status, error = await sender.send(
+        chat_id=delivery["chat_id"], campaign=campaign, keyboard=sender.build_keyboard(campaign)
+    )
+    if status == DeliveryStatus.RETRYABLE:
+        await schedule_mailing_retry(
+            campaign_id=delivery["campaign_id"],
+            campaign=campaign,
+            chat_id=delivery["chat_id"],
+            attempt=delivery["attempt"] + 1,
+            error=error,
+        )
+        return
+
+    if status == DeliveryStatus.FAILED:
+        await dead_letter_delivery(delivery=delivery, error=error)
+    await record_retry_result(campaign_id=delivery["campaign_id"], status=status)
+    await deactivate_blocked_users()
+
+
+async def get_dead_letters(count: int = 10) -> tuple[int, list[dict]]:
+    """Get the number of dead-lettered deliveries and the latest of them."""
+    total = await storage.redis.xlen(MAILING_DEAD)
+    entries = await storage.redis.xrevrange(MAILING_DEAD, count=count)
+    letters = [{**json.loads(data[b"delivery"]), "error": data[b"error"].decode("utf-8")} for _, data in entries]
+    return total, letters
+
+
+async def replay_dead_letters() -> int:
+    """Give every dead-lettered delivery a new round of retries, due right away."""
+    replayed = 0
+    while entries := await storage.redis.xrange(MAILING_DEAD, count=settings.MAILING_BATCH_SIZE):
+        now = time.time()
+        async with storage.redis.pipeline(transaction=True) as pipe:
+            for _, data in entries:
+                delivery = {**json.loads(data[b"delivery"]), "attempt": 1}
+                pipe.zadd(MAILING_RETRIES, {json.dumps(delivery): now})
+            pipe.xdel(MAILING_DEAD, *[entry_id for entry_id, _ in entries])
+            await pipe.execute()
+        replayed += len(entries)
+
+    if replayed:
+        mailing_retry_scheduled.set()
+    return replayed
+
+
+async def clear_dead_letters() -> None:
+    """Drop all dead-lettered deliveries."""
+    await storage.redis.delete(MAILING_DEAD)
+
+
+async def deactivate_blocked_users() -> None:
+    """Deactivate the users the last batches could not reach, so later campaigns skip them."""
+    blocked = sender.pop_blocked()
+    if blocked:
+        async with sessionmaker() as session:
+            await deactivate_users(session=session, user_ids=blocked)
+
+
+async def count_campaign_recipients(campaign_id: str, campaign: dict) -> int:
+    """Count the recipients of a campaign."""
+    if campaign.get("recipients"):
+        return await storage.redis.llen(MAILING_RECIPIENTS.format(campaign_id))
+
+    async with sessionmaker() as session:
+        return await get_users_count(session=session, is_active=True, **json.loads(campaign.get("audience", "{}")))
+
+
+async def iter_recipient_pages(
+    campaign_id: str, campaign: dict, after: int = 0
+) -> AsyncIterator[list[tuple[int, int]]]:
+    """Yield pages of (offset, chat id) recipients of a campaign, starting after the given offset.
+
+    Campaigns with an explicit recipient list are offset by their 1-based list position, the rest by users.id.
+    """
+    page_size = settings.MAILING_PAGE_SIZE
+
+    if campaign.get("recipients"):
+        start = after
+        while True:
+            chat_ids = await storage.redis.lrange(MAILING_RECIPIENTS.format(campaign_id), start, start + page_size - 1)
+            if not chat_ids:
+                return
+            yield [(start + index, int(chat_id)) for index, chat_id in enumerate(chat_ids, start=1)]
+            start += len(chat_ids)
+
+    audience = json.loads(campaign.get("audience", "{}"))
+    last_id = after
+    while True:
+        async with sessionmaker() as session:
+            users = await get_users_page(session=session, after_id=last_id, limit=page_size, **audience)
+        if not users:
+            return
+        last_id = users[-1][0]
+        yield users
+
+
+async def reclaim_mailing_entries() -> None:
+    """Take over entries left pending by crashed or failing workers, dead-lettering the ones that keep failing."""
+    start_id = "0-0"
+    while True:
+        start_id, entries, *_ = await storage.redis.xautoclaim(
+            MAILING_STREAM,
+            MAILING_GROUP,
+            MAILING_CONSUMER,
+            min_idle_time=settings.MAILING_CLAIM_IDLE_TIME,
+            start_id=start_id,
+            count=1,
+        )
+        for entry_id, entry_data in entries:
+            pending = await storage.redis.xpending_range(
+                MAILING_STREAM, MAILING_GROUP, min=entry_id, max=entry_id, count=1
+            )
+            times_delivered = pending[0]["times_delivered"] if pending else 0
+            if times_delivered > settings.MAILING_MAX_CLAIMS:
+                await dead_letter_mailing_entry(
+                    entry_id=entry_id, entry_data=entry_data, times_delivered=times_delivered
+                )
+            else:
+                await process_mailing_entries([(entry_id, entry_data)])
+
+        if start_id in (b"0-0", "0-0"):
+            return
+
+
+async def move_due_mailings() -> None:
+    """Move delayed campaigns whose scheduled time has come to the mailing stream."""
+    now = int(datetime.now().timestamp())
+    while True:
+        moved = await storage.redis.eval(
+            MOVE_DUE_MAILINGS, 2, MAILING_DELAYED, MAILING_STREAM, now, settings.MAILING_BATCH_SIZE
+        )
+        if moved < settings.MAILING_BATCH_SIZE:
+            return
+
+
+async def process_delayed_mailings() -> None:
+    """Sleep until the earliest delayed campaign is due or a new one is scheduled, then release due ones."""
     while True:
         try:
-            tasks = await storage.redis.xrange("mailing_stream")
+            mailing_scheduled.clear()
+            await move_due_mailings()
 
-            for task_id, task_data in tasks:
-                task = json.loads(task_data[b"data"].decode("utf-8"))
-                if not task.get("scheduled_time") or task.get("scheduled_time") <= int(datetime.now().timestamp()):
-                    await send_mailing(task)
-                    await storage.redis.xdel("mailing_stream", task_id)
+            sleep_time = settings.MAILING_SCHEDULER_MAX_SLEEP
+            earliest = await storage.redis.zrange(MAILING_DELAYED, 0, 0, withscores=True)
+            if earliest:
+                sleep_time = min(sleep_time, max(0.0, earliest[0][1] - datetime.now().timestamp()))
+
+            try:
+                async with asyncio.timeout(sleep_time):
+                    await mailing_scheduled.wait()
+            except TimeoutError:
+                pass
 
         except Exception as e:
-            logging.error(f"Error processing mailing tasks: {e}", exc_info=True)
-        await asyncio.sleep(5)
+            logging.error(f"Error processing delayed mailings: {e}", exc_info=True)
+            await asyncio.sleep(5)
 
 
-async def send_mailing(mailing_data: dict) -> None:
-    """Send mailing to a specific user."""
-    chat_id = mailing_data.get("chat_id")
-    text = mailing_data.get("text")
-    image = mailing_data.get("image")
-    button_text = mailing_data.get("button_text")
-    button_url = mailing_data.get("button_url")
+async def process_mailing_retries() -> None:
+    """Retry failed deliveries when they are due, apart from the main send loop but within the same rate limit."""
+    while True:
+        try:
+            mailing_retry_scheduled.clear()
+            due = await storage.redis.eval(
+                POP_DUE_RETRIES, 1, MAILING_RETRIES, time.time(), settings.MAILING_BATCH_SIZE
+            )
+            for delivery in due:
+                await retry_mailing_delivery(json.loads(delivery))
+            if len(due) == settings.MAILING_BATCH_SIZE:
+                continue
 
-    keyboard = None
-    if button_text and button_url:
-        keyboard = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text=button_text, url=button_url)]])
+            sleep_time = settings.MAILING_SCHEDULER_MAX_SLEEP
+            earliest = await storage.redis.zrange(MAILING_RETRIES, 0, 0, withscores=True)
+            if earliest:
+                sleep_time = min(sleep_time, max(0.0, earliest[0][1] - time.time()))
 
-    try:
-        if image:
-            await bot.send_photo(chat_id=chat_id, photo=image, caption=text, reply_markup=keyboard)
-        elif text:
-            await bot.send_message(chat_id=chat_id, text=text, reply_markup=keyboard)
-        await asyncio.sleep(1 / 30)
-    except Exception as e:
-        logging.error(f"Error sending mailing to {chat_id}: {e}")
+            try:
+                async with asyncio.timeout(sleep_time):
+                    await mailing_retry_scheduled.wait()
+            except TimeoutError:
+                pass
+
+        except Exception as e:
+            logging.error(f"Error processing mailing retries: {e}", exc_info=True)
+            await asyncio.sleep(5)
+
+
+async def process_mailing_tasks() -> None:
+    await create_mailing_group()
+    last_claim = 0.0
+
+    while True:
+        try:
+            if time.monotonic() - last_claim >= settings.MAILING_CLAIM_INTERVAL:
+                await reclaim_mailing_entries()
+                last_claim = time.monotonic()
+
+            # One campaign at a time, so no claimed entry waits idle behind another one. A campaign is a single
+            # entry and is drained by one worker; more workers drain different campaigns side by side, and all
+            # of them share the bot-wide rate limit, which is what bounds the throughput of a single campaign.
+            response = await storage.redis.xreadgroup(
+                MAILING_GROUP,
+                MAILING_CONSUMER,
+                {MAILING_STREAM: ">"},
+                count=1,
+                block=settings.MAILING_BLOCK_TIMEOUT,
+            )
+            for _, entries in response:
+                await process_mailing_entries(entries)
+
+        except Exception as e:
+            logging.error(f"Error processing mailing tasks: {e}", exc_info=True)
+            await asyncio.sleep(5)
@@ -1,13 +1,31 @@
+import asyncio
+import logging
+import sys
 import time
+from collections.abc import Awaitable, Callable, Coroutine, Hashable
 from datetime import datetime, date
+from typing import Any
 
 import httpx
 from bs4 import BeautifulSoup
 
+from app.core.bot import storage
+from app.core.config import settings
+from app.core.database import sessionmaker
+from app.services.cache import CatalogCache, ScheduleCache
+from app.services.mailing import create_mailing_campaign
+from app.services.snapshots import get_schedule_snapshot, save_schedule_snapshot
+from app.utils.breaker import CircuitBreaker
+from app.utils.ratelimit import Priority, PriorityLimiter
+from app.utils.scraper import Subjects, WeekSchedule, week_days
+
+
+class ScraperError(Exception):
+    """Raised when data cannot be fetched from the website."""
+
 
 class ScheduleScraper:
     BASE_URL = "http://rasp.kart.edu.ua/schedule"
-    TIMEOUT = 30
 
     HEADERS = {
         "Accept": "*/*",
@@ -29,20 +47,156 @@ class ScheduleScraper:
         10: "🔟",
     }
 
-    def __init__(self, timeout: int = TIMEOUT):
-        self.timeout = httpx.Timeout(timeout)
+    MAX_CHANGES = 20
+
+    def __init__(
+        self,
+        max_connections: int = settings.SCRAPER_MAX_CONNECTIONS,
+        max_keepalive_connections: int = settings.SCRAPER_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = settings.SCRAPER_KEEPALIVE_EXPIRY,
+        connect_timeout: float = settings.SCRAPER_CONNECT_TIMEOUT,
+        read_timeout: float = settings.SCRAPER_READ_TIMEOUT,
+        write_timeout: float = settings.SCRAPER_WRITE_TIMEOUT,
+        pool_timeout: float = settings.SCRAPER_POOL_TIMEOUT,
+        deadline: float = settings.SCRAPER_DEADLINE,
+        breaker_threshold: int = settings.SCRAPER_BREAKER_THRESHOLD,
+        breaker_reset_timeout: float = settings.SCRAPER_BREAKER_RESET_TIMEOUT,
+        rate_limit: float = settings.SCRAPER_RATE_LIMIT,
+        rate_burst: int = settings.SCRAPER_RATE_BURST,
+        max_in_flight: int = settings.SCRAPER_MAX_IN_FLIGHT,
+        cache_ttl: int = settings.SCHEDULE_CACHE_TTL,
+        cache_retention: int = settings.SCHEDULE_CACHE_RETENTION,
+        catalog_max_age: int = settings.CATALOG_CACHE_MAX_AGE,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(
+            connect=connect_timeout,
+            read=read_timeout,
+            write=write_timeout,
+            pool=pool_timeout,
+        )
+        self.deadline = deadline
+        self.client: httpx.AsyncClient | None = None
+        self.breaker = CircuitBreaker(failure_threshold=breaker_threshold, reset_timeout=breaker_reset_timeout)
+        self.limiter = PriorityLimiter(rate=rate_limit, burst=rate_burst, max_in_flight=max_in_flight)
+        self.cache = ScheduleCache(redis=storage.redis, ttl=cache_ttl, retention=cache_retention)
+        self.catalog = CatalogCache(redis=storage.redis, max_age=catalog_max_age)
+        self.in_flight: dict[Hashable, asyncio.Task] = {}
+        self.background: set[asyncio.Task] = set()
+        self.coalesced = 0
+        self.unconfirmed_empty: set[tuple[int, int, int]] = set()
+
+    async def start(self) -> None:
+        """Open the shared HTTP client with a keep-alive connection pool."""
+        if self.client is None or self.client.is_closed:
+            self.client = httpx.AsyncClient(headers=self.HEADERS, limits=self.limits, timeout=self.timeout)
+
+    async def close(self) -> None:
+        """Close the shared HTTP client and release pooled connections."""
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def _request(
+        self, method: str, url: str, data: str | None = None, priority: Priority = Priority.INTERACTIVE
+    ) -> httpx.Response:
+        """Send a rate-limited request through the shared HTTP client, guarded by the circuit breaker."""
+        if not self.breaker.allow():
+            raise ScraperError(f"Website is unavailable, retry in {self.breaker.retry_in:.0f}s")
+
+        if self.client is None:
+            await self.start()
+
+        try:
+            async with self.limiter.acquire(priority):
+                response = await self.client.request(method, url, data=data)
+            response.raise_for_status()
+        except httpx.HTTPError:
+            self.breaker.record_failure()
+            raise
+
+        self.breaker.record_success()
+        return response
+
+    async def _coalesce(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Share one in-flight call between concurrent callers with the same key."""
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(factory())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+
+        # Shield the shared task so a cancelled caller does not cancel it for everyone else.
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """Remove a finished call from the in-flight registry."""
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+        if not task.cancelled():
+            task.exception()
+
+    def _run_in_background(self, coro: Coroutine, description: str) -> None:
+        """Run a refresh without failing the request that triggered it."""
+
+        async def run() -> None:
+            try:
+                await coro
+            except Exception as e:
+                logging.warning(f"Failed to refresh {description}: {e}")
+
+        task = asyncio.create_task(run())
+        self.background.add(task)
+        task.add_done_callback(self.background.discard)
+
+    async def _get_catalog(self, key: tuple, factory: Callable[[Priority], Awaitable[dict]]) -> dict:
+        """Serve a catalog entry from the cache, refreshing it in the background once it is stale."""
+        cached = await self.catalog.get(key)
+        if cached is None:
+            try:
+                async with asyncio.timeout(self.deadline):
+                    return await self._coalesce(key, lambda: self._refresh_catalog(key, factory, Priority.INTERACTIVE))
+            except TimeoutError:
+                raise ScraperError(f"Website did not respond in {self.deadline}s")
+
+        items, is_stale = cached
+        if is_stale and key not in self.in_flight:
+            self._run_in_background(
+                self._coalesce(key, lambda: self._refresh_catalog(key, factory, Priority.BACKGROUND)),
+                description=f"catalog {key}",
+            )
+        return items
+
+    async def _refresh_catalog(
+        self, key: tuple, factory: Callable[[Priority], Awaitable[dict]], priority: Priority
+    ) -> dict:
+        """Fetch a catalog entry from the website and store it in the cache."""
+        items = await factory(priority)
+        await self.catalog.set(key, items)
+        return items
+
+    async def invalidate_catalog(self) -> None:
+        """Drop cached faculties and groups so they are fetched again."""
+        await self.catalog.invalidate_all()
 
     async def get_faculties(self) -> dict[str, str]:
-        """Get the faculties from the website."""
+        """Get the faculties, served from the catalog cache when possible."""
+        return await self._get_catalog(("faculties",), self._fetch_faculties)
+
+    async def _fetch_faculties(self, priority: Priority = Priority.INTERACTIVE) -> dict[str, str]:
+        """Fetch the faculties from the website."""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(self.BASE_URL, headers=self.HEADERS)
-                response.raise_for_status()
-                html = response.text
-                return self._parse_faculties(html)
+            response = await self._request("GET", self.BASE_URL, priority=priority)
+            return self._parse_faculties(response.text)
 
         except Exception as e:
-            raise Exception(f"Failed to get faculties: {e}")
+            raise ScraperError(f"Failed to get faculties: {e}")
 
     def _parse_faculties(self, response: str) -> dict[str, str]:
         """Parse the faculties from the website."""
@@ -59,23 +213,28 @@ class ScheduleScraper:
             return faculties
 
         except Exception as e:
-            raise Exception(f"Failed to parse faculties: {e}")
+            raise ScraperError(f"Failed to parse faculties: {e}")
 
     async def get_groups(self, year_id: int, faculty: int, course: int) -> dict[int, str]:
-        """Get the groups from the website."""
+        """Get the groups, served from the catalog cache when possible."""
+        return await self._get_catalog(
+            ("groups", year_id, faculty, course),
+            lambda priority: self._fetch_groups(year_id=year_id, faculty=faculty, course=course, priority=priority),
+        )
+
+    async def _fetch_groups(
+        self, year_id: int, faculty: int, course: int, priority: Priority = Priority.INTERACTIVE
+    ) -> dict[int, str]:
+        """Fetch the groups from the website."""
         url = f"{self.BASE_URL}/jdata"
         data = f"year_id={year_id}&faculty_id={faculty}&course_id={course}"
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(url, headers=self.HEADERS, data=data)
-                response.raise_for_status()
-                json_data = response.json()
-
-            return self._parse_groups(json_data)
+            response = await self._request("POST", url, data=data, priority=priority)
+            return self._parse_groups(response.json())
 
         except Exception as e:
-            raise Exception(f"Failed to get groups: {e}")
+            raise ScraperError(f"Failed to get groups: {e}")
 
     def _parse_groups(self, response: dict) -> dict[int, str]:
         """Parse the groups from the website."""
@@ -84,57 +243,174 @@ class ScheduleScraper:
             return {team["id"]: team["title"] for team in teams if "id" in team and "title" in team}
 
         except Exception as e:
-            raise Exception(f"Failed to parse groups: {e}")
+            raise ScraperError(f"Failed to parse groups: {e}")
+
+    async def get_week(self, year: int, semester: int, faculty: int, course: int, group: int) -> WeekSchedule:
+        """Get the whole week for the group, falling back to a stale copy when the website is unavailable."""
+        week = await self.cache.get(year, semester, faculty, course, group)
+        if week is not None and not week.is_stale:
+            return week
+
+        if week is None:
+            # Cold Redis: answer from the last stored snapshot and bring it up to date in the background.
+            week = await self._load_snapshot(year=year, semester=semester, group=group)
+            if week is not None:
+                if time.time() - week.fetched_at > self.cache.ttl:
+                    week = week._replace(is_stale=True)
+                await self.cache.set(year, semester, faculty, course, group, week)
+                self._run_in_background(
+                    self.refresh_week(year=year, semester=semester, faculty=faculty, course=course, group=group),
+                    description=f"schedule for group {group}",
+                )
+                return week
 
-    async def get_schedule(
-        self, year: int, semester: int, faculty: int, course: int, group: int, day: int
-    ) -> tuple[dict[int, str], dict[int, str]]:
-        """Get the schedule from the website."""
+        try:
+            async with asyncio.timeout(self.deadline):
+                return await self.refresh_week(
+                    year=year, semester=semester, faculty=faculty, course=course, group=group
+                )
+        except (ScraperError, TimeoutError) as e:
+            if week is None:
+                raise ScraperError(f"Failed to get schedule: {e}")
+
+            logging.warning(f"Serving stale schedule for group {group}: {e}")
+            return week
+
+    async def refresh_week(
+        self,
+        year: int,
+        semester: int,
+        faculty: int,
+        course: int,
+        group: int,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> WeekSchedule:
+        """Fetch the week from the website and store it in the cache, sharing concurrent fetches."""
+        return await self._coalesce(
+            ("week", year, semester, faculty, course, group),
+            lambda: self._refresh_week(
+                year=year, semester=semester, faculty=faculty, course=course, group=group, priority=priority
+            ),
+        )
+
+    async def _refresh_week(
+        self, year: int, semester: int, faculty: int, course: int, group: int, priority: Priority
+    ) -> WeekSchedule:
+        """Fetch the week from the website and store it in the cache."""
+        week = await self._fetch_week(
+            year=year, semester=semester, faculty=faculty, course=course, group=group, priority=priority
+        )
+        if not await self._confirm_week(year=year, semester=semester, group=group, week=week):
+            raise ScraperError(f"Got an empty schedule for group {group}, keeping the previous one until it repeats")
+
+        await self.cache.set(year, semester, faculty, course, group, week)
+        await self._save_snapshot(year=year, semester=semester, group=group, week=week)
+        return week
+
+    async def _confirm_week(self, year: int, semester: int, group: int, week: WeekSchedule) -> bool:
+        """Accept an empty week replacing a non-empty one only when two fetches in a row return it.
+
+        A maintenance page or an empty response parses as an empty week, which would otherwise
+        overwrite the schedule and notify the group that every pair was removed.
+        """
+        key = (year, semester, group)
+        if not week.is_empty:
+            self.unconfirmed_empty.discard(key)
+            return True
+        if key in self.unconfirmed_empty:
+            self.unconfirmed_empty.discard(key)
+            return True
+
+        previous = await self._load_snapshot(year=year, semester=semester, group=group)
+        if previous is None or previous.is_empty:
+            return True
+
+        self.unconfirmed_empty.add(key)
+        return False
+
+    async def _load_snapshot(self, year: int, semester: int, group: int) -> WeekSchedule | None:
+        """Load the week stored in the database, if any."""
+        try:
+            async with sessionmaker() as session:
+                return await get_schedule_snapshot(session=session, year=year, semester=semester, team_id=group)
+        except Exception as e:
+            logging.warning(f"Failed to load schedule snapshot for group {group}: {e}")
+            return None
+
+    async def _save_snapshot(self, year: int, semester: int, group: int, week: WeekSchedule) -> None:
+        """Persist the week in the database and notify the group when it changed."""
+        try:
+            async with sessionmaker() as session:
+                previous = await save_schedule_snapshot(
+                    session=session, year=year, semester=semester, team_id=group, week=week
+                )
+            if previous is None:
+                return
+
+            changes = week.diff(previous)
+            if changes:
+                await create_mailing_campaign(
+                    {"text": self.format_changes_message(changes=changes)}, audience={"user_group": group}
+                )
+        except Exception as e:
+            logging.warning(f"Failed to save schedule snapshot for group {group}: {e}")
+
+    async def _fetch_week(
+        self, year: int, semester: int, faculty: int, course: int, group: int, priority: Priority
+    ) -> WeekSchedule:
+        """Fetch the week from the website."""
         url = f"{self.BASE_URL}/jsearch?year_id={year}&semester_id={semester}&faculty_id={faculty}&course_id={course}&team_id={group}"
         data = f"_search=false&nd={round(time.time())}&rows=20&page=1&sidx=&sord=asc"
 
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(url, headers=self.HEADERS, data=data)
-                response.raise_for_status()
-                json_data = response.json()
-
-            return self._parse_schedule(json_data, day)
+            response = await self._request("POST", url, data=data, priority=priority)
+            return self.parse_week(response.json())._replace(fetched_at=time.time())
 
         except Exception as e:
-            raise Exception(f"Failed to get schedule: {e}")
+            raise ScraperError(f"Failed to get schedule: {e}")
 
-    def _parse_schedule(self, response: dict, day: int) -> tuple[dict[int, str], dict[int, str]]:
-        """Parse the schedule from the website."""
+    def parse_week(self, response: dict) -> WeekSchedule:
+        """Parse every day of the week from a single jsearch response."""
         try:
-            paired_subjects = {}
-            unpaired_subjects = {}
+            day_ids = [int(day["id"]) for day in week_days]
+            paired_subjects = {day: {} for day in day_ids}
+            unpaired_subjects = {day: {} for day in day_ids}
             previous_pair_number = None
 
             rows = response.get("rows", [])
 
             for subject in rows:
                 cell = subject.get("cell", [])
-                if len(cell) <= day:
+                if not cell:
                     continue
 
                 pair_number = cell[0] if cell[0] else previous_pair_number
                 week_type = cell[1] if len(cell) > 1 else ""
-                subject_name = cell[day] if len(cell) > day else ""
 
-                if subject_name and subject_name.strip():
-                    if week_type == "парн.":
-                        paired_subjects[pair_number] = subject_name.strip()
-                    elif week_type == "непарн.":
-                        unpaired_subjects[pair_number] = subject_name.strip()
+                if week_type == "парн.":
+                    subjects = paired_subjects
+                elif week_type == "непарн.":
+                    subjects = unpaired_subjects
+                else:
+                    subjects = None
+
+                if subjects is not None:
+                    for day in day_ids:
+                        subject_name = cell[day] if len(cell) > day else ""
+                        if subject_name and subject_name.strip():
+                            subjects[day][pair_number] = sys.intern(subject_name.strip())
 
                 if cell[0]:
                     previous_pair_number = cell[0]
 
-            return paired_subjects, unpaired_subjects
+            return WeekSchedule(
+                days=tuple(
+                    (tuple(paired_subjects[day].items()), tuple(unpaired_subjects[day].items())) for day in day_ids
+                )
+            )
 
         except Exception as e:
-            raise Exception(f"Failed to parse schedule: {e}")
+            raise ScraperError(f"Failed to parse schedule: {e}")
 
     @staticmethod
     def is_weekend() -> bool:
@@ -148,14 +424,29 @@ class ScheduleScraper:
         week_number = today.isocalendar()[1]
         return "Непарна" if week_number % 2 != 0 else "Парна"
 
-    def _replace_numbers_with_emojis(self, schedule: dict[int, str]) -> dict[str, str]:
-        """Replace numeric keys with emoji equivalents."""
-        return {self.EMOJI_MAP.get(key, str(key)): value for key, value in schedule.items()}
+    def _replace_numbers_with_emojis(self, subjects: Subjects) -> list[tuple[str, str]]:
+        """Replace pair numbers with emoji equivalents."""
+        return [(self.EMOJI_MAP.get(pair, str(pair)), subject) for pair, subject in subjects]
+
+    def format_changes_message(self, changes: list[tuple[int, bool, int, str | None, str | None]]) -> str:
+        """Format schedule changes notification message."""
+        day_names = {int(day["id"]): day["name"] for day in week_days}
+        lines = []
+        for day, paired, pair, old, new in changes[: self.MAX_CHANGES]:
+            week_type = "парна" if paired else "непарна"
+            pair_emoji = self.EMOJI_MAP.get(pair, str(pair))
+            lines.append(f"📅 <b>{day_names[day]}</b> ({week_type}) {pair_emoji}: {old or '—'} ➡️ <b>{new or '—'}</b>")
+
+        if len(changes) > self.MAX_CHANGES:
+            lines.append(f"… та ще {len(changes) - self.MAX_CHANGES} змін")
+
+        changes_text = "\n".join(lines)
+        return f"🔔 <b>Розклад вашої групи змінився!</b>\n\n{changes_text}"
 
     def format_schedule_message(
         self,
-        paired_subjects: dict[int, str],
-        unpaired_subjects: dict[int, str],
+        week: WeekSchedule,
+        day: int,
         selected_day: str,
         user_group_name: str,
     ) -> str:
@@ -165,13 +456,12 @@ class ScheduleScraper:
         current_week = self.get_current_week_parity()
 
         if is_weekend:
-            next_week_is_even = current_week == "Непарна"
-            selected_subjects = paired_subjects if next_week_is_even else unpaired_subjects
+            is_paired = current_week == "Непарна"
         else:
-            selected_subjects = paired_subjects if current_week == "Парна" else unpaired_subjects
+            is_paired = current_week == "Парна"
 
-        formatted_subjects = self._replace_numbers_with_emojis(selected_subjects)
-        subjects_text = "\n".join(f"{pair}: <b>{subject}</b>" for pair, subject in formatted_subjects.items())
+        formatted_subjects = self._replace_numbers_with_emojis(week.get_subjects(day=day, paired=is_paired))
+        subjects_text = "\n".join(f"{pair}: <b>{subject}</b>" for pair, subject in formatted_subjects)
 
         message_text = f"🔔 Показано розклад на <b>{selected_week}</b> тиждень!\n\n"
 
@@ -180,6 +470,10 @@ class ScheduleScraper:
         else:
             message_text += "🔍 На <b>цей</b> день ваш розклад вільний.\n\n"
 
+        if week.is_stale:
+            fetched_at = datetime.fromtimestamp(week.fetched_at).strftime("%d.%m.%Y %H:%M")
+            message_text += f"⚠️ Сайт розкладу недоступний, показано збережений розклад від <b>{fetched_at}</b>.\n\n"
+
         message_text += (
             f"⏰ Вибраний день — <b>{selected_day}</b>\n"
             f"📆 Поточна неділя — <b>{current_week}</b>\n"
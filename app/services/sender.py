@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from collections import Counter
+from collections.abc import Awaitable, Callable, Iterable
+from enum import StrEnum
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from redis.asyncio import Redis
+
+from app.core.bot import bot, storage
+from app.core.config import settings
+from app.utils.ratelimit import RedisTokenBucket
+
+BLOCKED_ERRORS = ("chat not found", "user is deactivated", "bot was blocked", "bot was kicked")
+
+
+class DeliveryStatus(StrEnum):
+    SENT = "sent"
+    RETRYABLE = "retryable"
+    FAILED = "failed"
+    BLOCKED = "blocked"
+
+
+def classify_error(error: Exception) -> DeliveryStatus:
+    """Classify a Telegram error as retryable, permanent or caused by an unreachable chat."""
+    if isinstance(error, (TelegramRetryAfter, TelegramNetworkError, TelegramServerError)):
+        return DeliveryStatus.RETRYABLE
+    if isinstance(error, TelegramForbiddenError):
+        return DeliveryStatus.BLOCKED
+    if isinstance(error, TelegramBadRequest) and any(text in error.message.lower() for text in BLOCKED_ERRORS):
+        return DeliveryStatus.BLOCKED
+    return DeliveryStatus.FAILED
+
+
+class MailingSender:
+    """Pool of concurrent senders sharing a token bucket and per-chat limits with every process through Redis."""
+
+    def __init__(
+        self,
+        bot: Bot,
+        redis: Redis,
+        rate: float = settings.MAILING_RATE_LIMIT,
+        burst: int = settings.MAILING_RATE_BURST,
+        concurrency: int = settings.MAILING_SENDERS,
+        chat_interval: float = settings.MAILING_CHAT_INTERVAL,
+    ):
+        self.bot = bot
+        self.bucket = RedisTokenBucket(redis=redis, key="mailing:bucket", rate=rate, burst=burst)
+        self.concurrency = concurrency
+        self.chat_interval = chat_interval
+        self.blocked: list[int] = []
+
+    @staticmethod
+    def build_keyboard(campaign: dict) -> InlineKeyboardMarkup | None:
+        """Build the inline keyboard of a campaign, if it has a button."""
+        button_text = campaign.get("button_text")
+        button_url = campaign.get("button_url")
+        if not (button_text and button_url):
+            return None
+        return InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text=button_text, url=button_url)]])
+
+    async def deliver(
+        self,
+        chat_ids: Iterable[int],
+        campaign: dict,
+        on_done: Callable[[int, DeliveryStatus, str | None], Awaitable[None]] | None = None,
+    ) -> Counter[DeliveryStatus]:
+        """Send a campaign to the chats concurrently and count the delivery results.
+
+        on_done is awaited with each chat id, its result and the error, if any, as soon as the send attempt is over.
+        """
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for chat_id in chat_ids:
+            queue.put_nowait(chat_id)
+
+        keyboard = self.build_keyboard(campaign)
+        results: Counter[DeliveryStatus] = Counter()
+
+        async def worker() -> None:
+            while not queue.empty():
+                chat_id = queue.get_nowait()
+                status, error = await self.send(chat_id=chat_id, campaign=campaign, keyboard=keyboard)
+                results[status] += 1
+                if on_done:
+                    await on_done(chat_id, status, error)
+
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(min(self.concurrency, queue.qsize())):
+                tg.create_task(worker())
+
+        return results
+
+    async def send(
+        self, chat_id: int, campaign: dict, keyboard: InlineKeyboardMarkup | None
+    ) -> tuple[DeliveryStatus, str | None]:
+        """Make one send attempt to a chat; returns the result and the error, if any.
+
+        Retryable errors are not retried here, so a slow chat never holds a sender back.
+        """
+        # Keeps at least chat_interval seconds between messages to the same chat.
+        await self.bucket.acquire(hold_key=f"mailing:chat:{chat_id}", hold=self.chat_interval)
+
+        try:
+            await self._send_message(chat_id=chat_id, campaign=campaign, keyboard=keyboard)
+            return DeliveryStatus.SENT, None
+        except Exception as e:
+            status = classify_error(e)
+            if isinstance(e, TelegramRetryAfter):
+                # Flood control applies to the whole bot, so every sender waits.
+                await self.bucket.pause(e.retry_after)
+            if status == DeliveryStatus.BLOCKED:
+                self.blocked.append(chat_id)
+
+            logging.warning(f"Error sending mailing to {chat_id}: {e}")
+            return status, str(e)
+
+    def pop_blocked(self) -> list[int]:
+        """Take the chats that turned out to be unreachable since the last call."""
+        blocked, self.blocked = self.blocked, []
+        return blocked
+
+    async def _send_message(self, chat_id: int, campaign: dict, keyboard: InlineKeyboardMarkup | None) -> None:
+        """Send the campaign content to one chat."""
+        text = campaign.get("text")
+        image = campaign.get("image")
+
+        if image:
+            await self.bot.send_photo(chat_id=chat_id, photo=image, caption=text, reply_markup=keyboard)
+        elif text:
+            await self.bot.send_message(chat_id=chat_id, text=text, reply_markup=keyboard)
+
+
+sender = MailingSender(bot=bot, redis=storage.redis)
@@ -0,0 +1,78 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.schedule import ScheduleSnapshot
+from app.utils.scraper import WeekSchedule
+
+
+async def get_schedule_snapshot(session: AsyncSession, year: int, semester: int, team_id: int) -> WeekSchedule | None:
+    """Get the last stored week for the group."""
+    query = select(ScheduleSnapshot.days, ScheduleSnapshot.fetched_at).filter_by(
+        year=year, semester=semester, team_id=team_id
+    )
+    result = await session.execute(query)
+    row = result.one_or_none()
+    if row is None:
+        return None
+
+    return WeekSchedule.from_days(days=row.days, fetched_at=row.fetched_at.timestamp())
+
+
+async def save_schedule_snapshot(
+    session: AsyncSession,
+    year: int,
+    semester: int,
+    team_id: int,
+    week: WeekSchedule,
+    touch_after: float = settings.SCHEDULE_CACHE_TTL / 2,
+) -> WeekSchedule | None:
+    """Store the week for the group and return the previous week if its content changed.
+
+    Unchanged weeks cost a single read; their fetched_at is only moved forward once it is
+    more than touch_after seconds behind, so the snapshot age stays roughly accurate.
+    """
+    query = select(ScheduleSnapshot.content_hash, ScheduleSnapshot.days, ScheduleSnapshot.fetched_at).filter_by(
+        year=year, semester=semester, team_id=team_id
+    )
+    result = await session.execute(query)
+    stored = result.one_or_none()
+    fetched_at = datetime.fromtimestamp(week.fetched_at, tz=timezone.utc)
+
+    if stored is not None and stored.content_hash == week.content_hash:
+        if week.fetched_at - stored.fetched_at.timestamp() > touch_after:
+            await session.execute(
+                update(ScheduleSnapshot)
+                .filter_by(year=year, semester=semester, team_id=team_id)
+                .values(fetched_at=fetched_at)
+            )
+            await session.commit()
+        return None
+
+    stmt = insert(ScheduleSnapshot).values(
+        year=year,
+        semester=semester,
+        team_id=team_id,
+        days=week.days,
+        content_hash=week.content_hash,
+        fetched_at=fetched_at,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ScheduleSnapshot.year, ScheduleSnapshot.semester, ScheduleSnapshot.team_id],
+        set_={
+            "days": stmt.excluded.days,
+            "content_hash": stmt.excluded.content_hash,
+            "fetched_at": stmt.excluded.fetched_at,
+        },
+        where=ScheduleSnapshot.content_hash.is_distinct_from(stmt.excluded.content_hash),
+    ).returning(ScheduleSnapshot.id)
+    result = await session.execute(stmt)
+    await session.commit()
+
+    # Another replica may have stored the same week first; only the writer reports the change.
+    if result.scalar_one_or_none() is None or stored is None:
+        return None
+    return WeekSchedule.from_days(days=stored.days, fetched_at=stored.fetched_at.timestamp())
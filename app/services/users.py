@@ -1,36 +1,170 @@
-from collections.abc import AsyncGenerator
+from collections.abc import Iterable
+from datetime import datetime, timezone
 
 from sqlalchemy import select, update, desc, func
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.bot import storage
+from app.core.config import settings
+from app.core.database import sessionmaker
 from app.models.user import User
+from app.services.cache import UserCache
+from app.services.invalidation import INVALIDATE_ALL, broadcast_invalidation, on_invalidation
+
+user_cache = UserCache(
+    redis=storage.redis,
+    ttl=settings.USER_CACHE_TTL,
+    local_ttl=settings.USER_CACHE_LOCAL_TTL,
+    max_size=settings.USER_CACHE_SIZE,
+)
+
+
+class AdminRegistry:
+    """In-memory set of admin user ids, kept in sync across replicas through invalidation broadcasts."""
+
+    def __init__(self):
+        self.user_ids: set[int] = set()
+        self.loaded = False
+
+    async def load(self, session: AsyncSession | None = None) -> None:
+        """Load the admin ids from the database."""
+        if session is None:
+            async with sessionmaker() as session:
+                self.user_ids = await get_admin_ids(session=session)
+        else:
+            self.user_ids = await get_admin_ids(session=session)
+        self.loaded = True
+
+    async def is_admin(self, user_id: int, session: AsyncSession | None = None) -> bool:
+        """Check if the user is an admin; the database is only queried when the set has to be (re)loaded."""
+        if not self.loaded:
+            await self.load(session=session)
+        return user_id in self.user_ids
+
+    def update(self, user_id: int, is_admin: bool) -> None:
+        """Add or remove a single admin."""
+        if is_admin:
+            self.user_ids.add(user_id)
+        else:
+            self.user_ids.discard(user_id)
+
+    def on_invalidation(self, key: str) -> None:
+        """Apply an admin change broadcast by a replica, or reload on the next check if changes were missed."""
+        if key == INVALIDATE_ALL:
+            self.loaded = False
+            return
+        user_id, _, is_admin = key.partition("=")
+        self.update(user_id=int(user_id), is_admin=is_admin == "1")
+
+
+admin_registry = AdminRegistry()
+
+
+def forget_users(key: str) -> None:
+    """Drop in-process profiles changed by a replica."""
+    if key == INVALIDATE_ALL:
+        user_cache.forget_all()
+    else:
+        user_cache.forget(map(int, key.split(",")))
+
+
+on_invalidation("user", forget_users)
+on_invalidation("admin", admin_registry.on_invalidation)
+
+
+def dump_user(user: User) -> dict:
+    """Convert a user to a cacheable profile."""
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+
+def load_user(profile: dict) -> User:
+    """Build a detached user from a cached profile."""
+    profile = dict(profile)
+    for key in ("created_at", "blocked_at"):
+        if isinstance(profile.get(key), str):
+            profile[key] = datetime.fromisoformat(profile[key])
+    return User(**profile)
+
+
+async def invalidate_users(user_ids: Iterable[int]) -> None:
+    """Drop cached profiles here and on every other replica."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    await user_cache.invalidate(user_ids)
+    await broadcast_invalidation("user", ",".join(map(str, user_ids)))
 
 
 async def get_user_by_id(session: AsyncSession, user_id: int) -> User | None:
-    """Get a single user by their unique user_id."""
+    """Get a single user by their unique user_id, served from the profile cache when possible.
+
+    Cached users are detached from the session, so they are for reading only.
+    """
+    profile = await user_cache.get(user_id)
+    if profile:
+        return load_user(profile)
+
+    user = await select_user(session=session, user_id=user_id)
+    if user:
+        await user_cache.set(user_id, dump_user(user))
+    return user
+
+
+async def select_user(session: AsyncSession, user_id: int) -> User | None:
+    """Get a single user by their unique user_id straight from the database."""
     query = select(User).where(User.user_id == user_id)
     result = await session.execute(query)
     return result.scalar_one_or_none()
 
 
-async def get_users(session: AsyncSession) -> AsyncGenerator[User, None]:
-    """Asynchronously retrieves users from the database using streaming data."""
-    stmt = select(User).execution_options(yield_per=1000, stream_results=True)
-    result = await session.stream(stmt)
-    async for users in result.scalars():
-        yield users
+async def get_users_page(session: AsyncSession, after_id: int, limit: int, **filters) -> list[tuple[int, int]]:
+    """Get (id, user_id) pairs of the users after the given row id, using keyset pagination."""
+    query = (
+        select(User.id, User.user_id)
+        .filter_by(**filters)
+        .where(User.is_active, User.id > after_id)
+        .order_by(User.id)
+        .limit(limit)
+    )
+    result = await session.execute(query)
+    return [tuple(row) for row in result.all()]
 
 
-async def get_user_is_admin(session: AsyncSession, user_id: int) -> bool:
-    """Check if the user is an admin."""
-    query = select(User.is_admin).filter_by(user_id=user_id)
+async def get_user_groups(session: AsyncSession) -> list[tuple[int, int, int]]:
+    """Get distinct (faculty, course, group) triples that at least one user has selected."""
+    query = (
+        select(User.user_faculty, User.user_course, User.user_group)
+        .where(User.user_faculty.is_not(None), User.user_course.is_not(None), User.user_group.is_not(None))
+        .distinct()
+    )
     result = await session.execute(query)
-    return result.scalar_one_or_none()
+    return [tuple(row) for row in result.all()]
+
+
+async def deactivate_users(session: AsyncSession, user_ids: list[int]) -> None:
+    """Mark the users who blocked the bot or deleted their account as inactive in one statement."""
+    query = (
+        update(User)
+        .where(User.user_id.in_(user_ids), User.is_active)
+        .values(is_active=False, blocked_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    await session.execute(query)
+    await session.commit()
+    await invalidate_users(user_ids)
 
 
-async def get_users_count(session: AsyncSession) -> int:
-    """Get the total count of users in the database."""
-    stmt = select(func.count()).select_from(User)
+async def get_admin_ids(session: AsyncSession) -> set[int]:
+    """Get the user_ids of all admins."""
+    query = select(User.user_id).where(User.is_admin)
+    result = await session.execute(query)
+    return set(result.scalars().all())
+
+
+async def get_users_count(session: AsyncSession, **filters) -> int:
+    """Get the total count of users in the database, optionally matching column filters."""
+    stmt = select(func.count()).select_from(User).filter_by(**filters)
     result = await session.execute(stmt)
     return result.scalar() or 0
 
@@ -52,25 +186,33 @@ async def create_user(
     user_group_name: str | None = None,
     is_admin: bool = False,
 ) -> User:
-    """Add a new user to the database."""
-    user = await get_user_by_id(session=session, user_id=user_id)
-    if user:
-        return user
-
-    new_user = User(
-        user_id=user_id,
-        username=username,
-        user_faculty=user_faculty,
-        user_course=user_course,
-        user_group=user_group,
-        user_group_name=user_group_name,
-        is_admin=is_admin,
-    )
+    """Add a new user to the database, or reactivate and return the existing one, in a single statement.
+
+    Only the profile cache is checked first: on a miss the upsert itself is the lookup.
+    """
+    profile = await user_cache.get(user_id)
+    if profile and profile.get("is_active"):
+        return load_user(profile)
 
-    session.add(new_user)
+    query = (
+        insert(User)
+        .values(
+            user_id=user_id,
+            username=username,
+            user_faculty=user_faculty,
+            user_course=user_course,
+            user_group=user_group,
+            user_group_name=user_group_name,
+            is_admin=is_admin,
+        )
+        .on_conflict_do_update(index_elements=[User.user_id], set_={"is_active": True, "blocked_at": None})
+        .returning(*User.__table__.columns)
+    )
+    result = await session.execute(query)
+    user = User(**result.mappings().one())
     await session.commit()
-    await session.refresh(new_user)
-    return new_user
+    await invalidate_users([user_id])
+    return user
 
 
 async def update_user(
@@ -83,11 +225,7 @@ async def update_user(
     user_group_name: str | None = None,
     is_admin: bool | None = None,
 ) -> User | None:
-    """Updating user data in the database."""
-    user = await get_user_by_id(session=session, user_id=user_id)
-    if not user:
-        return
-
+    """Updating user data in the database with a single UPDATE ... RETURNING."""
     update_data = {}
     if username is not None:
         update_data["username"] = username
@@ -102,15 +240,26 @@ async def update_user(
     if is_admin is not None:
         update_data["is_admin"] = is_admin
 
-    if update_data:
-        query = (
-            update(User)
-            .where(User.user_id == user_id)
-            .values(**update_data)
-            .execution_options(synchronize_session="fetch")
-        )
-        await session.execute(query)
-        await session.commit()
-        await session.refresh(user)
+    if not update_data:
+        return await get_user_by_id(session=session, user_id=user_id)
+
+    query = (
+        update(User)
+        .where(User.user_id == user_id)
+        .values(**update_data)
+        .returning(*User.__table__.columns)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(query)
+    row = result.mappings().one_or_none()
+    if row is None:
+        return
+
+    user = User(**row)
+    await session.commit()
+    await invalidate_users([user_id])
+    if is_admin is not None:
+        admin_registry.update(user_id=user_id, is_admin=is_admin)
+        await broadcast_invalidation("admin", f"{user_id}={int(is_admin)}")
 
     return user
@@ -0,0 +1,69 @@
+import asyncio
+import logging
+import random
+from datetime import datetime
+
+from app.core.config import settings
+from app.core.database import sessionmaker
+from app.services.scraper import scraper
+from app.services.users import get_user_groups
+from app.services.website import get_website
+from app.utils.ratelimit import Priority
+
+
+class ScheduleWarmer:
+    def __init__(
+        self,
+        interval: int = settings.WARMUP_INTERVAL,
+        concurrency: int = settings.WARMUP_CONCURRENCY,
+        jitter: float = settings.WARMUP_JITTER,
+    ):
+        self.interval = interval
+        self.concurrency = concurrency
+        self.jitter = jitter
+        self.last_sweep_at: datetime | None = None
+
+    async def sweep(self) -> None:
+        """Re-fetch the schedule of every group that users have selected."""
+        async with sessionmaker() as session:
+            website = await get_website(session=session)
+            groups = await get_user_groups(session=session)
+
+        if not website:
+            return
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def warm(faculty: int, course: int, group: int) -> None:
+            async with semaphore:
+                await asyncio.sleep(random.uniform(0, self.jitter))
+                try:
+                    await scraper.refresh_week(
+                        year=website.year,
+                        semester=website.semester,
+                        faculty=faculty,
+                        course=course,
+                        group=group,
+                        priority=Priority.BACKGROUND,
+                    )
+                except Exception as e:
+                    logging.warning(f"Failed to warm schedule for group {group}: {e}")
+
+        async with asyncio.TaskGroup() as tg:
+            for faculty, course, group in groups:
+                tg.create_task(warm(faculty=faculty, course=course, group=group))
+
+        self.last_sweep_at = datetime.now()
+        logging.info(f"Schedule warm-up finished for {len(groups)} groups")
+
+
+warmer = ScheduleWarmer()
+
+
+async def process_schedule_warmup() -> None:
+    while True:
+        try:
+            await warmer.sweep()
+        except Exception as e:
+            logging.error(f"Error warming schedules: {e}", exc_info=True)
+        await asyncio.sleep(warmer.interval)
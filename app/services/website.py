@@ -1,11 +1,49 @@
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import sessionmaker
 from app.models.website import Website
+from app.services.invalidation import broadcast_invalidation, on_invalidation
+
+
+class WebsiteCache:
+    """Process-wide copy of the Website row, dropped whenever any replica updates it."""
+
+    def __init__(self):
+        self.website: Website | None = None
+
+    def set(self, website: Website) -> Website:
+        """Keep a copy detached from any session, so commits elsewhere never expire it."""
+        self.website = Website(id=website.id, year=website.year, semester=website.semester)
+        return self.website
+
+    def invalidate(self, key: str = "") -> None:
+        """Drop the cached copy, so the next read loads it again."""
+        self.website = None
+
+
+website_cache = WebsiteCache()
+on_invalidation("website", website_cache.invalidate)
+
+
+async def load_website() -> None:
+    """Load the Website row into the process-wide cache."""
+    async with sessionmaker() as session:
+        await get_website(session=session)
 
 
 async def get_website(session: AsyncSession) -> Website | None:
-    """Get the first record from the Website table."""
+    """Get the first record from the Website table, served from the process-wide cache when loaded."""
+    website = website_cache.website
+    if website is not None:
+        return website
+
+    website = await select_website(session=session)
+    return website_cache.set(website) if website else None
+
+
+async def select_website(session: AsyncSession) -> Website | None:
+    """Get the first record from the Website table straight from the database."""
     query = select(Website).limit(1)
     result = await session.execute(query)
     return result.scalar_one_or_none()
@@ -16,26 +54,30 @@ async def update_website(
     year: int | None = None,
     semester: int | None = None,
 ) -> Website | None:
-    """Updating the data in the Website table."""
-    website = await get_website(session=session)
-    if not website:
-        return
-
+    """Updating the data in the Website table with a single UPDATE ... RETURNING."""
     update_data = {}
     if year is not None:
         update_data["year"] = year
     if semester is not None:
         update_data["semester"] = semester
 
-    if update_data:
-        query = (
-            update(Website)
-            .where(Website.id == website.id)
-            .values(**update_data)
-            .execution_options(synchronize_session="fetch")
-        )
-        await session.execute(query)
-        await session.commit()
-        await session.refresh(website)
+    if not update_data:
+        return await get_website(session=session)
+
+    query = (
+        update(Website)
+        .where(Website.id == select(Website.id).limit(1).scalar_subquery())
+        .values(**update_data)
+        .returning(Website.id, Website.year, Website.semester)
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.execute(query)
+    row = result.mappings().one_or_none()
+    if row is None:
+        return
 
+    website = Website(**row)
+    await session.commit()
+    website_cache.invalidate()
+    await broadcast_invalidation("website")
     return website
@@ -0,0 +1,47 @@
+import time
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency for a cool-down period after repeated failures."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds left until the next trial call is allowed."""
+        if self.state == self.CLOSED:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+    def allow(self) -> bool:
+        """Check whether a call may go through, letting one trial call pass after the cool-down."""
+        if self.state == self.CLOSED:
+            return True
+        if self.retry_in > 0:
+            return False
+
+        # Restart the cool-down so only one trial call goes through per period.
+        self.state = self.HALF_OPEN
+        self.opened_at = time.monotonic()
+        return True
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful call."""
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        """Count a failed call and open the breaker once the threshold is reached."""
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
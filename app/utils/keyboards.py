@@ -48,13 +48,63 @@ def mailing_kb() -> InlineKeyboardMarkup:
     """Generates the mailing menu keyboard."""
     kb = InlineKeyboardBuilder()
     kb.add(InlineKeyboardButton(text="📥 Почати розсилку", callback_data="start_mailing"))
+    kb.add(InlineKeyboardButton(text="📋 Розсилка за списком", callback_data="add_recipients"))
     kb.add(InlineKeyboardButton(text="✍️ Текст", callback_data="add_text"))
     kb.add(InlineKeyboardButton(text="🌄 Медіа", callback_data="add_media"))
     kb.add(InlineKeyboardButton(text="⏹️ Кнопка", callback_data="add_button"))
     kb.add(InlineKeyboardButton(text="⏰ Запланувати", callback_data="add_delay"))
+    kb.add(InlineKeyboardButton(text="👥 Аудиторія", callback_data="mailing_audience"))
     kb.add(InlineKeyboardButton(text="🔄 Видалити інформацію", callback_data="reset_mailing"))
+    kb.add(InlineKeyboardButton(text="📊 Активні розсилки", callback_data="mailing_campaigns"))
+    kb.add(InlineKeyboardButton(text="☠️ Невдалі доставки", callback_data="dead_letters"))
     kb.add(InlineKeyboardButton(text="⬅️ Назад", callback_data="options"))
-    kb.adjust(1, 2, 2, 1)
+    kb.adjust(2, 2, 2, 2, 2, 1)
+    return kb.as_markup()
+
+
+def audience_kb() -> InlineKeyboardMarkup:
+    """Generates the mailing audience menu keyboard."""
+    kb = InlineKeyboardBuilder()
+    kb.add(InlineKeyboardButton(text="🏛 Факультет", callback_data="audience_faculties"))
+    kb.add(InlineKeyboardButton(text="🎓 Курс", callback_data="audience_courses"))
+    kb.add(InlineKeyboardButton(text="👥 Група", callback_data="audience_groups"))
+    kb.add(InlineKeyboardButton(text="🔄 Усі користувачі", callback_data="audience_reset"))
+    kb.add(InlineKeyboardButton(text="⬅️ Назад", callback_data="manage_mailing"))
+    kb.adjust(3, 1, 1)
+    return kb.as_markup()
+
+
+def dead_letters_kb() -> InlineKeyboardMarkup:
+    """Generates the dead-lettered deliveries menu keyboard."""
+    kb = InlineKeyboardBuilder()
+    kb.add(InlineKeyboardButton(text="🔁 Повторити всі", callback_data="replay_dead_letters"))
+    kb.add(InlineKeyboardButton(text="🗑 Очистити", callback_data="clear_dead_letters"))
+    kb.add(InlineKeyboardButton(text="⬅️ Назад", callback_data="manage_mailing"))
+    kb.adjust(2, 1)
+    return kb.as_markup()
+
+
+def mailing_campaigns_kb(campaigns: dict) -> InlineKeyboardMarkup:
+    """Generates the active mailing campaigns menu keyboard."""
+    kb = InlineKeyboardBuilder()
+    for key, value in campaigns.items():
+        kb.add(InlineKeyboardButton(text=value, callback_data=f"campaign_{key}"))
+    kb.add(InlineKeyboardButton(text="⬅️ Назад", callback_data="manage_mailing"))
+    kb.adjust(1)
+    return kb.as_markup()
+
+
+def campaign_kb(campaign_id: str, is_paused: bool) -> InlineKeyboardMarkup:
+    """Generates the mailing campaign control keyboard."""
+    kb = InlineKeyboardBuilder()
+    kb.add(InlineKeyboardButton(text="🔄 Оновити", callback_data=f"campaign_{campaign_id}"))
+    if is_paused:
+        kb.add(InlineKeyboardButton(text="▶️ Продовжити", callback_data=f"resume_campaign_{campaign_id}"))
+    else:
+        kb.add(InlineKeyboardButton(text="⏸ Призупинити", callback_data=f"pause_campaign_{campaign_id}"))
+    kb.add(InlineKeyboardButton(text="⛔️ Скасувати", callback_data=f"cancel_campaign_{campaign_id}"))
+    kb.add(InlineKeyboardButton(text="⬅️ Назад", callback_data="mailing_campaigns"))
+    kb.adjust(1, 2, 1)
     return kb.as_markup()
 
 
@@ -79,31 +129,31 @@ def get_days_kb(user_exists: bool) -> InlineKeyboardMarkup:
     return kb.as_markup()
 
 
-def get_faculties_kb(faculties: dict) -> InlineKeyboardMarkup:
+def get_faculties_kb(faculties: dict, prefix: str = "", back: str = "schedule") -> InlineKeyboardMarkup:
     """Generates the faculties menu keyboard."""
     kb = InlineKeyboardBuilder()
     for key, value in faculties.items():
-        kb.add(InlineKeyboardButton(text=value, callback_data=f"faculty_{key}"))
-    kb.add(InlineKeyboardButton(text="⬅️ Назад", callback_data="schedule"))
+        kb.add(InlineKeyboardButton(text=value, callback_data=f"{prefix}faculty_{key}"))
+    kb.add(InlineKeyboardButton(text="⬅️ Назад", callback_data=back))
     kb.adjust(1)
     return kb.as_markup()
 
 
-def get_courses_kb() -> InlineKeyboardMarkup:
+def get_courses_kb(prefix: str = "", back: str = "schedule") -> InlineKeyboardMarkup:
     """Generates the courses menu keyboard."""
     kb = InlineKeyboardBuilder()
     for i in range(1, 7):
-        kb.add(InlineKeyboardButton(text=f"{i}-й курс", callback_data=f"course_{i}"))
-    kb.add(InlineKeyboardButton(text="⬅️ Назад", callback_data="schedule"))
+        kb.add(InlineKeyboardButton(text=f"{i}-й курс", callback_data=f"{prefix}course_{i}"))
+    kb.add(InlineKeyboardButton(text="⬅️ Назад", callback_data=back))
     kb.adjust(1)
     return kb.as_markup()
 
 
-def get_groups_kb(groups: dict) -> InlineKeyboardMarkup:
+def get_groups_kb(groups: dict, prefix: str = "", back: str = "schedule") -> InlineKeyboardMarkup:
     """Generates the groups menu keyboard."""
     kb = InlineKeyboardBuilder()
     for key, value in groups.items():
-        kb.add(InlineKeyboardButton(text=value, callback_data=f"group_{key};{value}"))
-    kb.add(InlineKeyboardButton(text="⬅️ Назад", callback_data="schedule"))
+        kb.add(InlineKeyboardButton(text=value, callback_data=f"{prefix}group_{key}"))
+    kb.add(InlineKeyboardButton(text="⬅️ Назад", callback_data=back))
     kb.adjust(1)
     return kb.as_markup()
@@ -0,0 +1,177 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from enum import IntEnum
+
+from redis.asyncio import Redis
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class TokenBucket:
+    """Token bucket that refills at a fixed rate up to a burst size."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        """Add the tokens accumulated since the last refill."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token can be taken."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """Take one token; callers must check delay() first."""
+        self.tokens -= 1
+
+
+class RedisTokenBucket:
+    """Token bucket kept in Redis, so every process shares one rate limit."""
+
+    # Takes a token unless the bucket is paused, empty or the hold key is still busy.
+    # Returns "0" on success, otherwise the seconds to wait before trying again.
+    ACQUIRE = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local hold = tonumber(ARGV[3])
+
+local paused = redis.call('PTTL', KEYS[2])
+if paused > 0 then
+    return tostring(paused / 1000)
+end
+if hold > 0 then
+    local busy = redis.call('PTTL', KEYS[3])
+    if busy > 0 then
+        return tostring(busy / 1000)
+    end
+end
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+if tokens < 1 then
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+    return tostring((1 - tokens) / rate)
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - 1), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+if hold > 0 then
+    redis.call('SET', KEYS[3], 1, 'PX', math.ceil(hold * 1000))
+end
+return '0'
+"""
+
+    def __init__(self, redis: Redis, key: str, rate: float, burst: int):
+        self.redis = redis
+        self.key = key
+        self.rate = rate
+        self.burst = burst
+        self.script = redis.register_script(self.ACQUIRE)
+
+    async def acquire(self, hold_key: str | None = None, hold: float = 0.0) -> None:
+        """Wait for a token and take it, optionally keeping hold_key busy for hold seconds afterwards."""
+        keys = [self.key, f"{self.key}:paused", hold_key or f"{self.key}:hold"]
+        while (delay := float(await self.script(keys=keys, args=[self.rate, self.burst, hold if hold_key else 0]))) > 0:
+            await asyncio.sleep(delay)
+
+    async def pause(self, seconds: float) -> None:
+        """Stop handing out tokens to every process for the given number of seconds."""
+        await self.redis.set(f"{self.key}:paused", 1, px=max(1, int(seconds * 1000)))
+
+
+class PriorityLimiter:
+    """Grants slots in priority order, limited by a token bucket and a cap on calls in flight."""
+
+    def __init__(self, rate: float, burst: int, max_in_flight: int):
+        self.bucket = TokenBucket(rate=rate, burst=burst)
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.waiters: list[tuple[int, int, asyncio.Future]] = []
+        self.sequence = itertools.count()
+        self.timer: asyncio.TimerHandle | None = None
+        self.granted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of callers waiting for a slot."""
+        return sum(1 for _, _, future in self.waiters if not future.done())
+
+    @property
+    def average_wait(self) -> float:
+        """Average time callers waited for a slot, in seconds."""
+        return self.total_wait / self.granted if self.granted else 0.0
+
+    @asynccontextmanager
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE) -> AsyncIterator[None]:
+        """Wait for a slot; lower priority values are served first."""
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (priority, next(self.sequence), future))
+        self._dispatch()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been granted right before the caller was cancelled.
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+        wait = time.monotonic() - started
+        self.granted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        """Free a slot and hand it to the next waiter."""
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant slots to waiters while both the cap and the bucket allow it."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        while self.waiters and self.in_flight < self.max_in_flight:
+            _, _, future = self.waiters[0]
+            if future.done():
+                heapq.heappop(self.waiters)
+                continue
+
+            delay = self.bucket.delay()
+            if delay > 0:
+                self.timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+
+            heapq.heappop(self.waiters)
+            self.bucket.take()
+            self.in_flight += 1
+            future.set_result(None)
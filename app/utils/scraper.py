@@ -1,3 +1,8 @@
+import hashlib
+import json
+import sys
+from typing import NamedTuple
+
 week_days = [
     {"name": "Понеділок", "id": "2"},
     {"name": "Вівторок", "id": "3"},
@@ -5,3 +10,70 @@ week_days = [
     {"name": "Четвер", "id": "5"},
     {"name": "П'ятниця", "id": "6"},
 ]
+
+FIRST_DAY_ID = int(week_days[0]["id"])
+
+unavailable_message = "⁉️ Сайт розкладу зараз недоступний. Спробуйте, будь ласка, пізніше."
+
+
+Subjects = tuple[tuple[int, str], ...]
+
+
+class WeekSchedule(NamedTuple):
+    """Immutable week schedule: day × parity × pair number → subject."""
+
+    days: tuple[tuple[Subjects, Subjects], ...]
+    fetched_at: float = 0.0
+    is_stale: bool = False
+
+    def get_subjects(self, day: int, paired: bool) -> Subjects:
+        """Get (pair number, subject) pairs for a week day id and week parity."""
+        index = day - FIRST_DAY_ID
+        if not 0 <= index < len(self.days):
+            return ()
+        return self.days[index][0 if paired else 1]
+
+    def diff(self, previous: "WeekSchedule") -> list[tuple[int, bool, int, str | None, str | None]]:
+        """Cells changed since the previous week as (day id, paired, pair number, old subject, new subject)."""
+        changes = []
+        for index, (day, previous_day) in enumerate(zip(self.days, previous.days)):
+            for parity, (subjects, previous_subjects) in enumerate(zip(day, previous_day)):
+                if subjects == previous_subjects:
+                    continue
+
+                new, old = dict(subjects), dict(previous_subjects)
+                for pair in dict.fromkeys([*old, *new]):
+                    if old.get(pair) != new.get(pair):
+                        changes.append((FIRST_DAY_ID + index, parity == 0, pair, old.get(pair), new.get(pair)))
+        return changes
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether the week has no subjects at all."""
+        return not any(subjects for day in self.days for subjects in day)
+
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 of the subjects, independent of when the week was fetched."""
+        return hashlib.sha256(json.dumps(self.days, ensure_ascii=False).encode()).hexdigest()
+
+    def to_json(self) -> str:
+        """Serialize the week to JSON."""
+        return json.dumps({"days": self.days, "fetched_at": self.fetched_at}, ensure_ascii=False)
+
+    @classmethod
+    def from_days(cls, days: list, fetched_at: float) -> "WeekSchedule":
+        """Build a week from JSON-decoded days."""
+        return cls(
+            days=tuple(
+                tuple(tuple((pair, sys.intern(subject)) for pair, subject in subjects) for subjects in day)
+                for day in days
+            ),
+            fetched_at=fetched_at,
+        )
+
+    @classmethod
+    def from_json(cls, raw: str | bytes) -> "WeekSchedule":
+        """Deserialize a week stored by to_json."""
+        data = json.loads(raw)
+        return cls.from_days(days=data["days"], fetched_at=data["fetched_at"])
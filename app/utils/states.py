@@ -17,3 +17,4 @@ class MailingStates(StatesGroup):
     button_text: State = State()
     button_url: State = State()
     delay: State = State()
+    recipients: State = State()
@@ -0,0 +1,83 @@
+"""Compare enqueueing a mailing one recipient at a time with the pipelined bulk enqueue.
+
+Writes to the Redis the bot is configured with, under bench:* keys that are deleted afterwards.
+The per-user run repeats what create_mailing_task did for every recipient: parse the delay,
+serialize the payload and XADD it in its own round trip.
+
+    python -m benchmarks.bench_bulk_enqueue --recipients 20000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta
+
+from app.core.bot import storage
+from app.core.config import settings
+from app.services.mailing import push_mailing_recipients
+
+BENCH_STREAM = "bench:mailing_stream"
+BENCH_RECIPIENTS = "bench:mailing:recipients"
+
+
+async def enqueue_per_user(chat_ids: list[int], mailing_data: dict) -> None:
+    """One XADD per recipient, with the payload prepared again every time."""
+    for chat_id in chat_ids:
+        data = {**mailing_data, "chat_id": chat_id}
+        data["scheduled_time"] = int(datetime.strptime(data["delay"], "%d.%m.%Y %H:%M").timestamp())
+        await storage.redis.xadd(BENCH_STREAM, {"data": json.dumps(data)})
+
+
+async def enqueue_bulk(recipients: AsyncIterator[int], batch_size: int) -> None:
+    """Recipients batched into pipelines, the way create_mailing_bulk writes them."""
+    batch = []
+    async for chat_id in recipients:
+        batch.append(chat_id)
+        if len(batch) >= batch_size:
+            await push_mailing_recipients(recipients_key=BENCH_RECIPIENTS, chat_ids=batch)
+            batch = []
+    if batch:
+        await push_mailing_recipients(recipients_key=BENCH_RECIPIENTS, chat_ids=batch)
+
+
+async def iterate(chat_ids: list[int]) -> AsyncIterator[int]:
+    """Yield the recipients like a streamed source would."""
+    for chat_id in chat_ids:
+        yield chat_id
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run both ways of enqueueing and report their throughput."""
+    chat_ids = list(range(100_000_000, 100_000_000 + args.recipients))
+    mailing_data = {
+        "text": "🔔 <b>Зміни в розкладі</b>",
+        "button_text": "Розклад",
+        "button_url": "https://t.me/",
+        "delay": (datetime.now() + timedelta(days=1)).strftime("%d.%m.%Y %H:%M"),
+    }
+
+    try:
+        started = time.perf_counter()
+        await enqueue_per_user(chat_ids=chat_ids, mailing_data=mailing_data)
+        per_user = time.perf_counter() - started
+
+        started = time.perf_counter()
+        await enqueue_bulk(recipients=iterate(chat_ids), batch_size=args.batch_size)
+        bulk = time.perf_counter() - started
+    finally:
+        await storage.redis.delete(BENCH_STREAM, BENCH_RECIPIENTS)
+        await storage.redis.aclose()
+
+    print(f"recipients:  {args.recipients}")
+    print(f"per user:    {per_user:8.3f} s   {args.recipients / per_user:12.0f} recipients/s")
+    print(f"pipelined:   {bulk:8.3f} s   {args.recipients / bulk:12.0f} recipients/s   batch={args.batch_size}")
+    print(f"speedup:     {per_user / bulk:8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=settings.MAILING_BULK_BATCH_SIZE)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,167 @@
+"""Count database round trips and time the user and website writes behind each handler, before and after.
+
+The "before" flows repeat what the services did when every write was a SELECT followed by the write,
+a commit and a refresh. Runs against the database and Redis the bot is configured with; the users it
+creates are deleted and the website settings are restored afterwards. The profile cache is dropped
+before every run, so the numbers are for a user the bot has not seen recently.
+
+    python -m benchmarks.bench_db_roundtrips --rounds 50
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import delete, event, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.bot import storage
+from app.core.database import engine, sessionmaker
+from app.models.user import User
+from app.models.website import Website
+from app.services.users import create_user, select_user, update_user, user_cache
+from app.services.website import select_website, update_website
+
+FIRST_USER_ID = 9_000_000_000
+
+
+class RoundTrips:
+    """Counts statements, BEGINs and COMMITs sent through the engine."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args) -> None:
+        self.count += 1
+
+
+async def create_user_before(session: AsyncSession, user_id: int) -> User:
+    """SELECT, INSERT, COMMIT and refresh."""
+    user = await select_user(session=session, user_id=user_id)
+    if user:
+        return user
+
+    user = User(user_id=user_id)
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+
+async def update_user_before(session: AsyncSession, user_id: int, user_group: int) -> User | None:
+    """SELECT, UPDATE with synchronize_session="fetch", COMMIT and refresh."""
+    user = await select_user(session=session, user_id=user_id)
+    if not user:
+        return None
+
+    query = (
+        update(User)
+        .where(User.user_id == user_id)
+        .values(user_group=user_group)
+        .execution_options(synchronize_session="fetch")
+    )
+    await session.execute(query)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+
+async def update_website_before(session: AsyncSession, year: int) -> Website | None:
+    """SELECT, UPDATE with synchronize_session="fetch", COMMIT and refresh."""
+    website = await select_website(session=session)
+    if not website:
+        return None
+
+    query = (
+        update(Website)
+        .where(Website.id == website.id)
+        .values(year=year)
+        .execution_options(synchronize_session="fetch")
+    )
+    await session.execute(query)
+    await session.commit()
+    await session.refresh(website)
+    return website
+
+
+async def measure(
+    round_trips: RoundTrips, rounds: int, flow: Callable[[AsyncSession, int], Awaitable[object]]
+) -> tuple[float, float]:
+    """Run a flow once per round, each for its own user id, and return round trips and milliseconds per call."""
+    latencies = []
+    counts = []
+    for index in range(rounds):
+        user_id = FIRST_USER_ID + index
+        await user_cache.invalidate([user_id])
+
+        async with sessionmaker() as session:
+            round_trips.count = 0
+            started = time.perf_counter()
+            await flow(session, user_id)
+            latencies.append((time.perf_counter() - started) * 1000)
+            counts.append(round_trips.count)
+
+    return statistics.mean(counts), statistics.median(latencies)
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Measure every handler's writes with the old and the new services."""
+    round_trips = RoundTrips()
+    for name in ("before_cursor_execute", "begin", "commit"):
+        event.listen(engine.sync_engine, name, round_trips)
+
+    async with sessionmaker() as session:
+        website = await select_website(session=session)
+
+    async def clean_users() -> None:
+        async with sessionmaker() as session:
+            await session.execute(delete(User).where(User.user_id >= FIRST_USER_ID))
+            await session.commit()
+
+    scenarios = [
+        ("/start, new user", True, create_user_before, lambda s, u: create_user(session=s, user_id=u)),
+        ("/start, known user", False, create_user_before, lambda s, u: create_user(session=s, user_id=u)),
+        (
+            "choose group",
+            False,
+            lambda s, u: update_user_before(session=s, user_id=u, user_group=1),
+            lambda s, u: update_user(session=s, user_id=u, user_group=1),
+        ),
+    ]
+    if website:
+        scenarios.append(
+            (
+                "admin sets year",
+                False,
+                lambda s, u: update_website_before(session=s, year=website.year),
+                lambda s, u: update_website(session=s, year=website.year),
+            )
+        )
+
+    print(f"{'handler':<20} {'before':>22} {'after':>22}")
+    try:
+        for name, fresh, before, after in scenarios:
+            results = []
+            for flow in (before, after):
+                if fresh:
+                    await clean_users()
+                results.append(await measure(round_trips, args.rounds, flow))
+
+            (before_trips, before_ms), (after_trips, after_ms) = results
+            print(
+                f"{name:<20} {before_trips:5.1f} trips {before_ms:7.2f} ms "
+                f"{after_trips:5.1f} trips {after_ms:7.2f} ms"
+            )
+    finally:
+        await clean_users()
+        await user_cache.invalidate(FIRST_USER_ID + index for index in range(args.rounds))
+        await engine.dispose()
+        await storage.redis.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,103 @@
+"""Compare scraper request latency with a new HTTP client per request and with the shared pooled client.
+
+Runs against a local stub of the schedule website. A new connection waits --connect-delay before it is
+served, which stands in for the TCP handshake to the real website; every request takes --service-time.
+
+    python -m benchmarks.bench_http_client --requests 500 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+import httpx
+
+from app.services.scraper import ScheduleScraper
+
+RESPONSE = json.dumps({"rows": [{"cell": ["1", "парн.", "", "Математика"]}]}).encode()
+
+
+async def serve(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, connect_delay: float, service_time: float
+) -> None:
+    """Answer keep-alive HTTP/1.1 requests with a fixed jsearch response."""
+    await asyncio.sleep(connect_delay)
+    try:
+        while head := await reader.readuntil(b"\r\n\r\n"):
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            await asyncio.sleep(service_time)
+
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                b"Content-Length: " + str(len(RESPONSE)).encode() + b"\r\n\r\n" + RESPONSE
+            )
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def measure(
+    send: Callable[[str], Awaitable[httpx.Response]], url: str, requests: int, concurrency: int
+) -> list[float]:
+    """Send the requests from a few concurrent workers and return every latency in milliseconds."""
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await send(url)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def report(name: str, latencies: list[float]) -> None:
+    """Print the p50 and p99 latency of a run."""
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"{name:<22} p50 {percentiles[49]:7.2f} ms   p99 {percentiles[98]:7.2f} ms   n={len(latencies)}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Start the stub website and measure both ways of sending requests to it."""
+    server = await asyncio.start_server(
+        lambda reader, writer: serve(reader, writer, args.connect_delay, args.service_time), "127.0.0.1", 0
+    )
+    host, port = server.sockets[0].getsockname()[:2]
+    url = f"http://{host}:{port}/schedule/jsearch"
+
+    async def send_with_new_client(url: str) -> httpx.Response:
+        async with httpx.AsyncClient(headers=ScheduleScraper.HEADERS) as client:
+            return await client.post(url, data="_search=false")
+
+    scraper = ScheduleScraper()
+    await scraper.start()
+
+    async def send_with_shared_client(url: str) -> httpx.Response:
+        return await scraper.client.post(url, data="_search=false")
+
+    async with server:
+        report("client per request", await measure(send_with_new_client, url, args.requests, args.concurrency))
+        report("shared pooled client", await measure(send_with_shared_client, url, args.requests, args.concurrency))
+        # The server only shuts down once the pooled keep-alive connections are closed.
+        await scraper.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--connect-delay", type=float, default=0.02, help="seconds a new connection waits")
+    parser.add_argument("--service-time", type=float, default=0.005, help="seconds every request takes")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,96 @@
+"""Measure how long parsing a jsearch response takes and how much memory the parsed week keeps, per group.
+
+Uses recorded responses from --fixtures (one JSON file per group) when given, otherwise generates
+responses shaped like the website's, with subjects repeated across groups as they are in practice.
+
+    python -m benchmarks.bench_parse_week --groups 300
+    python -m benchmarks.bench_parse_week --fixtures path/to/responses
+"""
+
+import argparse
+import gc
+import json
+import random
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from app.services.scraper import ScheduleScraper
+from app.utils.scraper import week_days
+
+SUBJECTS = [
+    f"{name} ({kind}) {teacher} ауд. {room}"
+    for name in ("Вища математика", "Фізика", "Теоретична механіка", "Іноземна мова", "Програмування")
+    for kind in ("Лек", "Пр", "Лаб")
+    for teacher in ("доц. Петренко О.В.", "проф. Коваленко І.М.", "ст. викл. Шевчук Н.П.")
+    for room in (101, 214, 305)
+]
+
+
+def generate_response(rng: random.Random, pairs: int = 6) -> dict:
+    """Build a jsearch response with a paired and an unpaired row for every pair number."""
+    last_day = max(int(day["id"]) for day in week_days)
+    rows = []
+    for pair in range(1, pairs + 1):
+        for index, week_type in enumerate(("парн.", "непарн.")):
+            cell = [str(pair) if index == 0 else "", week_type]
+            cell += [rng.choice(SUBJECTS) if rng.random() < 0.6 else "" for _ in range(2, last_day + 1)]
+            rows.append({"id": str(len(rows)), "cell": cell})
+    return {"page": 1, "total": 1, "records": len(rows), "rows": rows}
+
+
+def load_responses(args: argparse.Namespace) -> list[str]:
+    """Get the raw responses, as they arrive from the website."""
+    if args.fixtures:
+        return [path.read_text(encoding="utf-8") for path in sorted(Path(args.fixtures).glob("*.json"))]
+
+    rng = random.Random(args.seed)
+    return [json.dumps(generate_response(rng), ensure_ascii=False) for _ in range(args.groups)]
+
+
+def retained_bytes(build: Callable[[], Any]) -> tuple[Any, int]:
+    """Build an object and return it with the memory it keeps allocated."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main(args: argparse.Namespace) -> None:
+    """Parse every response and report the time and memory per group."""
+    scraper = ScheduleScraper()
+    responses = load_responses(args)
+    if not responses:
+        raise SystemExit("No responses to parse")
+
+    decoded = [json.loads(raw) for raw in responses]
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        for response in decoded:
+            scraper.parse_week(response)
+    elapsed = time.perf_counter() - started
+    parse_us = elapsed / (args.rounds * len(decoded)) * 1_000_000
+
+    _, json_bytes = retained_bytes(lambda: [json.loads(raw) for raw in responses])
+    weeks, week_bytes = retained_bytes(lambda: [scraper.parse_week(json.loads(raw)) for raw in responses])
+
+    groups = len(responses)
+    print(f"groups:                {groups}")
+    print(f"parse_week:            {parse_us:8.1f} µs per group")
+    print(f"decoded JSON kept:     {json_bytes / groups / 1024:8.1f} KiB per group")
+    print(f"parsed week kept:      {week_bytes / groups / 1024:8.1f} KiB per group")
+    print(f"non-empty weeks:       {sum(not week.is_empty for week in weeks)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="directory with recorded jsearch responses, one JSON file per group")
+    parser.add_argument("--groups", type=int, default=300, help="generated responses when no fixtures are given")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    main(parser.parse_args())
@@ -0,0 +1,51 @@
+import os
+import unittest
+from unittest.mock import AsyncMock, MagicMock
+
+for name, value in {
+    "BOT_TOKEN": "123456:TEST",
+    "DEBUG": "false",
+    "POSTGRES_USER": "test",
+    "POSTGRES_PASSWORD": "test",
+    "POSTGRES_HOST": "localhost",
+    "POSTGRES_PORT": "5432",
+    "POSTGRES_DB": "test",
+    "REDIS_USER": "test",
+    "REDIS_PASSWORD": "test",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "REDIS_DB": "0",
+}.items():
+    os.environ.setdefault(name, value)
+
+from aiogram.exceptions import TelegramRetryAfter  # noqa: E402
+from aiogram.methods import SendMessage  # noqa: E402
+
+from app.services.sender import DeliveryStatus, MailingSender  # noqa: E402
+
+
+class MailingSenderFloodControlTest(unittest.IsolatedAsyncioTestCase):
+    async def test_retry_after_pauses_every_sender_and_is_retryable(self) -> None:
+        """A flood-control error pauses the shared bucket for retry_after and leaves the delivery to a retry."""
+        redis = MagicMock()
+        redis.register_script.return_value = AsyncMock(return_value=b"0")
+        redis.set = AsyncMock()
+
+        bot = MagicMock()
+        bot.send_message = AsyncMock(
+            side_effect=TelegramRetryAfter(
+                method=SendMessage(chat_id=1, text="hi"), message="Too Many Requests", retry_after=5
+            )
+        )
+
+        sender = MailingSender(bot=bot, redis=redis, chat_interval=0)
+        status, error = await sender.send(chat_id=1, campaign={"text": "hi"}, keyboard=None)
+
+        self.assertEqual(status, DeliveryStatus.RETRYABLE)
+        self.assertIsNotNone(error)
+        redis.set.assert_awaited_once_with("mailing:bucket:paused", 1, px=5000)
+        self.assertEqual(sender.pop_blocked(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()